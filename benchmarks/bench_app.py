@@ -0,0 +1,223 @@
+"""Multi-session load test for moodfeeltt.py on Streamlit's headless AppTest.
+
+    python benchmarks/bench_app.py [--sessions 20] [--flows 5] [--check | --update-baseline]
+
+Each simulated session runs realistic flows -- pick a mood and health
+condition, move the count slider, press "Get Food Recommendations", save a
+favorite, type into the search box -- in its own process (AppTest keeps
+global state and can't drive several sessions from threads). Every process
+first runs a warm-up session, so the Streamlit import and the process-wide
+caches are paid before measuring; then all sessions start together. The run
+reports p50/p95/p99 rerun latency, memory per live session (traced on one
+more session afterwards, so tracing doesn't slow the timed reruns) and the
+bytes of element protos the app emits per rerun.
+
+``--update-baseline`` stores the numbers in ``benchmarks/baseline_app.json``;
+``--check`` compares against it and exits non-zero when p95 latency, memory
+per session or bytes per rerun regress by more than ``--tolerance``. Any
+session that fails makes the run exit non-zero.
+"""
+import argparse
+import gc
+import json
+import multiprocessing
+import os
+import queue
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+APP = ROOT / "moodfeeltt.py"
+BASELINE = Path(__file__).with_name("baseline_app.json")
+CHECKED = ("p95_ms", "mem_per_session_kb", "bytes_per_rerun")
+SEARCHES = ("paneer", "pan", "millet dosa", "quinoa", "khichdi", "soup", "low-sodium")
+
+sys.path.insert(0, str(ROOT))
+
+
+def _tree_bytes(node):
+    total = 0
+    proto = getattr(node, "proto", None)
+    if proto is not None:
+        total += proto.ByteSize()
+    children = getattr(node, "children", None) or {}
+    for child in children.values():
+        total += _tree_bytes(child)
+    return total
+
+
+class Session:
+    def __init__(self, seed, timeout):
+        from streamlit.testing.v1 import AppTest
+
+        self.rng = random.Random(seed)
+        self.at = AppTest.from_file(str(APP), default_timeout=timeout)
+        self.latencies = []
+        self.bytes = []
+
+    def _run(self, action=None):
+        t0 = time.perf_counter()
+        (action or self.at).run()
+        self.latencies.append(time.perf_counter() - t0)
+        if self.at.exception:
+            raise RuntimeError(f"app raised: {self.at.exception[0].value}")
+        self.bytes.append(_tree_bytes(self.at._tree))
+
+    def _button(self, prefix):
+        return next(b for b in self.at.button if b.label.startswith(prefix))
+
+    def flow(self, moods, conditions):
+        at, rng = self.at, self.rng
+        at.selectbox[0].select(rng.choice(moods))
+        self._run()
+        at.selectbox[1].select(rng.choice(conditions))
+        self._run()
+        at.slider[0].set_value(rng.randint(1, 5))
+        self._run()
+        self._run(self._button("🍽️").click())
+        saves = [b for b in at.button if b.label.startswith("⭐ Save")]
+        if saves:
+            self._run(rng.choice(saves).click())
+        query = rng.choice(SEARCHES)
+        box = next(t for t in at.text_input if t.label.startswith("Type a dish"))
+        for n in range(3, len(query) + 1, 2):  # as-you-type
+            self._run(box.input(query[:n]))
+
+
+def _pct(values, q):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))]
+
+
+def _worker(n, flows, timeout, seed, barrier, results):
+    """One measured session in a fresh process, after a warm-up session."""
+    latencies, emitted, mem, error = [], [], 0, None
+    try:
+        from moodfood.catalog import get_catalog
+
+        catalog = get_catalog()
+        warm = Session(-1 - seed - n, timeout)
+        warm._run()
+        warm.flow(catalog.moods, catalog.conditions)
+        del warm
+        gc.collect()
+        barrier.wait(timeout * 10)
+        session = Session(seed + n, timeout)
+        session._run()
+        for _ in range(flows):
+            session.flow(catalog.moods, catalog.conditions)
+        latencies, emitted, done = session.latencies, session.bytes, time.time()
+        # memory on a separate session: tracing would slow the timed reruns down
+        tracemalloc.start()
+        base = tracemalloc.get_traced_memory()[0]
+        traced = Session(seed + n, timeout)
+        traced._run()
+        traced.flow(catalog.moods, catalog.conditions)
+        mem = tracemalloc.get_traced_memory()[0] - base
+        tracemalloc.stop()
+    except Exception as exc:
+        barrier.abort()  # don't leave the other sessions waiting for this one
+        error, done = repr(exc), time.time()
+    results.put((latencies, emitted, mem, error, done))
+
+
+def run(sessions, flows, timeout, seed=0):
+    ctx = multiprocessing.get_context("spawn")
+    barrier = ctx.Barrier(sessions + 1)
+    results = ctx.Queue()
+    procs = [ctx.Process(target=_worker, args=(n, flows, timeout, seed, barrier, results))
+             for n in range(sessions)]
+    for proc in procs:
+        proc.start()
+    try:
+        barrier.wait(timeout * 10)
+    except Exception:
+        pass  # a session failed during warm-up; it reports the error below
+    t0 = time.time()
+    latencies, emitted, mems, errors, finished = [], [], [], [], t0
+    for _ in procs:
+        try:
+            lat, out, mem, error, done = results.get(timeout=timeout * (flows + 10))
+        except queue.Empty:
+            errors.append("session timed out")
+            continue
+        if error:
+            errors.append(error)
+            continue
+        latencies += lat
+        emitted += out
+        mems.append(mem)
+        finished = max(finished, done)
+    for proc in procs:
+        proc.join(timeout)
+        if proc.is_alive():
+            proc.kill()
+    wall = finished - t0
+
+    if not latencies:
+        raise SystemExit(f"no session completed: {errors[:3]}")
+    for error in errors[:3]:
+        print(f"session failed: {error}", file=sys.stderr)
+    return {
+        "sessions": sessions,
+        "reruns": len(latencies),
+        "errors": len(errors),
+        "wall_s": round(wall, 3),
+        "reruns_per_s": round(len(latencies) / wall, 1),
+        "p50_ms": round(_pct(latencies, 0.50) * 1e3, 2),
+        "p95_ms": round(_pct(latencies, 0.95) * 1e3, 2),
+        "p99_ms": round(_pct(latencies, 0.99) * 1e3, 2),
+        "mem_per_session_kb": round(sum(mems) / len(mems) / 1024, 1),
+        "bytes_per_rerun": round(sum(emitted) / len(emitted)),
+    }
+
+
+def check(result, baseline, tolerance):
+    failures = []
+    for key in CHECKED:
+        if key in baseline and result[key] > baseline[key] * (1 + tolerance):
+            failures.append(f"{key}: {result[key]} > {baseline[key]} (+{tolerance:.0%})")
+    return failures
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sessions", type=int, default=20)
+    parser.add_argument("--flows", type=int, default=5)
+    parser.add_argument("--timeout", type=float, default=30.0)
+    parser.add_argument("--tolerance", type=float, default=0.25)
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument("--check", action="store_true", help="fail on regression vs. the baseline")
+    mode.add_argument("--update-baseline", action="store_true")
+    args = parser.parse_args(argv)
+
+    # keep the run's favorites and caches out of the working tree
+    tmp = tempfile.mkdtemp(prefix="moodfood-bench-")
+    os.environ.setdefault("MOODFOOD_DB", os.path.join(tmp, "bench.db"))
+    os.environ.setdefault("MOODFOOD_CACHE_DB", os.path.join(tmp, "cache.db"))
+    os.environ.setdefault("MOODFOOD_METRICS_PORT", "0")  # one metrics port, many processes
+    os.chdir(ROOT)
+
+    result = run(args.sessions, args.flows, args.timeout)
+    print(json.dumps(result, indent=2))
+    if args.update_baseline:
+        BASELINE.write_text(json.dumps(result, indent=2) + "\n")
+        print(f"baseline written to {BASELINE.relative_to(ROOT)}")
+    elif args.check:
+        if not BASELINE.exists():
+            print("no baseline yet; run with --update-baseline first")
+            return 1
+        failures = check(result, json.loads(BASELINE.read_text()), args.tolerance)
+        for failure in failures:
+            print(f"REGRESSION {failure}")
+        if failures:
+            return 1
+    return 1 if result["errors"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,76 @@
+"""Weekly meal-plan benchmark.
+
+    python benchmarks/bench_planner.py [--plans 500] [--batch 2000] [--budget-ms 50]
+
+Reports single-plan latency (cold first plan and warm p50/p95/p99/max) over
+random mood trajectories and conditions, and plans/second of ``plan_batch``.
+Exits non-zero when warm p99 exceeds ``--budget-ms``.
+"""
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from moodfood.catalog import get_catalog  # noqa: E402
+from moodfood.planner import Planner, plan_batch  # noqa: E402
+
+
+def _workload(catalog, n, seed=0):
+    rng = random.Random(seed)
+    return [(rng.sample(catalog.moods, rng.randint(1, 3)), rng.choice(catalog.conditions))
+            for _ in range(n)]
+
+
+def bench_plan(catalog, plans):
+    t0 = time.perf_counter()
+    planner = Planner(catalog)
+    setup = time.perf_counter() - t0
+    reqs = _workload(catalog, plans)
+    t0 = time.perf_counter()
+    planner.plan(*reqs[0])
+    cold = time.perf_counter() - t0
+    timings, relaxed = [], 0
+    for moods, health in reqs:
+        t0 = time.perf_counter()
+        plan = planner.plan(moods, health)
+        timings.append(time.perf_counter() - t0)
+        relaxed += plan.relaxed > 0
+    timings.sort()
+    pct = lambda q: timings[min(len(timings) - 1, int(q * len(timings)))] * 1e3  # noqa: E731
+    return {
+        "setup_ms": setup * 1e3, "cold_ms": cold * 1e3,
+        "p50_ms": pct(0.50), "p95_ms": pct(0.95), "p99_ms": pct(0.99), "max_ms": timings[-1] * 1e3,
+        "relaxed_plans": relaxed,
+    }
+
+
+def bench_batch(catalog, size):
+    reqs = _workload(catalog, size, seed=1)
+    t0 = time.perf_counter()
+    plan_batch(reqs, seed=0, catalog=catalog, restarts=4)
+    elapsed = time.perf_counter() - t0
+    return {"batch": size, "s": elapsed, "plans_per_s": size / elapsed}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--plans", type=int, default=500)
+    parser.add_argument("--batch", type=int, default=2000)
+    parser.add_argument("--budget-ms", type=float, default=50.0)
+    args = parser.parse_args(argv)
+
+    catalog = get_catalog()
+    single = bench_plan(catalog, args.plans)
+    print("plan: setup {setup_ms:.1f} ms, cold {cold_ms:.1f} ms, p50 {p50_ms:.2f} ms, "
+          "p95 {p95_ms:.2f} ms, p99 {p99_ms:.2f} ms, max {max_ms:.2f} ms, "
+          "relaxed {relaxed_plans}".format(**single))
+    batch = bench_batch(catalog, args.batch)
+    print("plan_batch: {batch} plans in {s:.2f} s ({plans_per_s:,.0f} plans/s)".format(**batch))
+    return 1 if single["p99_ms"] > args.budget_ms else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
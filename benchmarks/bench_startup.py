@@ -0,0 +1,167 @@
+"""Cold-start benchmark: import time of the core and time to first render.
+
+    python benchmarks/bench_startup.py [--runs 5] [--check | --update-baseline]
+
+Each measurement runs in a fresh interpreter, as a new worker would:
+
+* ``python -X importtime`` for ``import moodfood``, the core API
+  (catalog + engine + search) and the modules the app imports up front,
+  reporting the best total and the slowest imports. The total is the
+  statement's own wall time, so interpreter startup (``site``,
+  ``encodings``, any ``.pth`` hooks) is not part of it, and the breakdown
+  leaves out the modules a bare ``-c pass`` already loads;
+* time to first render: ``AppTest`` runs ``moodfeeltt.py`` for a first
+  session in a new process (Streamlit import included), then for a second
+  session in the same process, which shows what the ``st.cache_resource``
+  warm path costs.
+
+``--update-baseline`` stores the numbers in ``benchmarks/baseline_startup.json``;
+``--check`` exits non-zero when any of them regresses by more than
+``--tolerance`` plus ``--slack`` milliseconds (so scheduler jitter on a
+sub-millisecond import doesn't fail the run). The render numbers are
+skipped when Streamlit is not installed.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+BASELINE = Path(__file__).with_name("baseline_startup.json")
+
+IMPORTS = {
+    "package": "import moodfood",
+    "core": "from moodfood import get_catalog, recommend, SearchIndex",
+    "app_modules": "import moodfood.assets, moodfood.catalog, moodfood.engine, "
+                   "moodfood.favorites, moodfood.metrics, moodfood.state",
+}
+
+_RENDER = """
+import json, time
+t0 = time.perf_counter()
+from streamlit.testing.v1 import AppTest
+imported = time.perf_counter()
+at = AppTest.from_file({app!r}, default_timeout=60)
+at.run()
+first = time.perf_counter()
+assert not at.exception, at.exception
+AppTest.from_file({app!r}, default_timeout=60).run()
+second = time.perf_counter()
+print(json.dumps({{"streamlit_import_ms": (imported - t0) * 1e3,
+                   "first_render_ms": (first - imported) * 1e3,
+                   "second_session_ms": (second - first) * 1e3}}))
+"""
+
+
+def _env():
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [str(ROOT), env.get("PYTHONPATH")]))
+    return env
+
+
+# time is built in, so timing the statement doesn't import anything itself
+_TIMED = "import time; t0 = time.perf_counter(); {code}; print(time.perf_counter() - t0)"
+
+
+def _imports(code):
+    """``(stdout, [(cumulative ms, module), ...])`` for one fresh ``-X importtime`` run."""
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", code], cwd=ROOT,
+                          env=_env(), capture_output=True, text=True, check=True)
+    rows = []
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line.split("|")
+        rows.append((int(cumulative) / 1e3, name.strip()))
+    return proc.stdout, rows
+
+
+def importtime(code, startup):
+    """``(total ms, [(cumulative ms, module), ...] slowest first)`` for one fresh import.
+
+    ``-X importtime`` doesn't see ``importlib.import_module`` (how the package
+    loads its submodules), so the total is timed around ``code`` instead of
+    summed from the rows. Modules in ``startup`` were loaded before ``code``
+    ran and are left out of the rows.
+    """
+    out, rows = _imports(_TIMED.format(code=code))
+    rows = [(ms, name) for ms, name in rows if name not in startup]
+    return float(out.split()[-1]) * 1e3, sorted(rows, reverse=True)
+
+
+def render(runs):
+    try:
+        import streamlit  # noqa: F401
+    except ImportError:
+        return None
+    env = _env()
+    tmp = tempfile.mkdtemp(prefix="moodfood-startup-")
+    env.setdefault("MOODFOOD_DB", os.path.join(tmp, "startup.db"))
+    env.setdefault("MOODFOOD_CACHE_DB", os.path.join(tmp, "cache.db"))
+    env.setdefault("MOODFOOD_METRICS_PORT", "0")
+    best = None
+    for _ in range(runs):
+        proc = subprocess.run([sys.executable, "-c", _RENDER.format(app=str(ROOT / "moodfeeltt.py"))],
+                              cwd=ROOT, env=env, capture_output=True, text=True, check=True)
+        result = json.loads(proc.stdout.strip().splitlines()[-1])
+        best = result if best is None else {k: min(v, best[k]) for k, v in result.items()}
+    return best
+
+
+def run(runs, top=8):
+    result = {}
+    startup = {name for _, name in _imports("pass")[1]}
+    for label, code in IMPORTS.items():
+        timings = [importtime(code, startup) for _ in range(runs)]
+        total, rows = min(timings, key=lambda t: t[0])
+        result[f"import_{label}_ms"] = round(total, 2)
+        print(f"{label:12s} {total:8.2f} ms  ({code})")
+        for ms, name in rows[:top]:
+            print(f"    {ms:8.2f} ms  {name}")
+    rendered = render(runs)
+    if rendered is None:
+        print("streamlit not installed; skipping time to first render")
+    else:
+        result.update({k: round(v, 1) for k, v in rendered.items()})
+        print("streamlit import {streamlit_import_ms:.1f} ms, first render {first_render_ms:.1f} ms, "
+              "second session {second_session_ms:.1f} ms".format(**rendered))
+    return result
+
+
+def check(result, baseline, tolerance, slack=0.0):
+    return [f"{key}: {result[key]} > {baseline[key]} (+{tolerance:.0%} +{slack} ms)"
+            for key in result
+            if key in baseline and result[key] > baseline[key] * (1 + tolerance) + slack]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5, help="fresh processes per number (best wins)")
+    parser.add_argument("--tolerance", type=float, default=0.3)
+    parser.add_argument("--slack", type=float, default=1.0, help="ms allowed on top of --tolerance")
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument("--check", action="store_true", help="fail on regression vs. the baseline")
+    mode.add_argument("--update-baseline", action="store_true")
+    args = parser.parse_args(argv)
+
+    result = run(args.runs)
+    print(json.dumps(result, indent=2))
+    if args.update_baseline:
+        BASELINE.write_text(json.dumps(result, indent=2) + "\n")
+        print(f"baseline written to {BASELINE.relative_to(ROOT)}")
+    elif args.check:
+        if not BASELINE.exists():
+            print("no baseline yet; run with --update-baseline first")
+            return 1
+        failures = check(result, json.loads(BASELINE.read_text()), args.tolerance, args.slack)
+        for failure in failures:
+            print(f"REGRESSION {failure}")
+        return 1 if failures else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,126 +1,62 @@
+import re
 import streamlit as st
-import random
+import uuid
+
+# Only what the first render needs is imported here. Integrations (sign-in,
+# Gemini, Twilio, nutrition APIs) and the NumPy-backed scorer and planner are
+# imported inside the factories below, the first time a session needs them.
+from moodfood.assets import load_assets
+from moodfood.catalog import Catalog, CatalogLoader
+from moodfood.engine import Recommendation, format_picks, recommend
+from moodfood.favorites import FavoritesStore
+from moodfood.metrics import Metrics, make_profiler, make_server
+from moodfood.state import make_state
+
+# ---------------- Instrumentation ----------------
+# Phase timings, runs, clicks and cache hit rates, scraped from
+# http://127.0.0.1:9464/metrics (`metrics_port` in secrets; 0 turns it off).
+# With `profile_token` set in secrets, open the app with ?profile=<token> to get
+# a cProfile/tracemalloc dump of each of that session's full reruns.
+@st.cache_resource
+def get_metrics():
+    return Metrics()
+
+@st.cache_resource
+def get_metrics_server():
+    return make_server(get_metrics(), st.secrets)
+
+@st.cache_resource
+def get_profiler():
+    return make_profiler(st.secrets)
+
+metrics = get_metrics()
+get_metrics_server()
+profiler = get_profiler()
+profiling = (profiler is not None and profiler.allows(st.query_params.get("profile"))
+             and profiler.start())
+metrics.inc("moodfood_runs_total", scope="page")
+
+def clicked(button):
+    metrics.inc("moodfood_clicks_total", button=button)
 
 # ---------------- Page Config ----------------
-st.set_page_config(
-    page_title="Emobite - Mood Based Food Suggestions (50+ per mood & health)",
-    page_icon="🍲",
-    layout="centered"
-)
+with metrics.phase("page_config"):
+    st.set_page_config(
+        page_title="Emobite - Mood Based Food Suggestions (50+ per mood & health)",
+        page_icon="🍲",
+        layout="centered"
+    )
 
-# ---------------- Strong SEO (Meta, OG, Twitter, JSON-LD, Canonical, Robots) ----------------
-st.markdown("""
-<!-- Primary SEO -->
-<meta name="description" content="MoodFood: 50+ mood-based food suggestions with 50+ health condition modifiers. Get personalized diet ideas for Happy, Sad, Stressed, Angry, Tired, Excited, Relaxed, Anxious & Bored moods." />
-<meta name="keywords" content="mood food app, mood based diet, food suggestions, healthy eating, diabetes friendly food, high BP diet, PCOS diet, thyroid diet, weight loss food, heart healthy recipes, Indian food, meal ideas" />
-<meta name="author" content="Manish Yadav"/>
-<meta name="robots" content="index, follow"/>
-
-<!-- Canonical & Sitemap -->
-<link rel="canonical" href="https://yourdomain.com/"/>
-<link rel="sitemap" type="application/xml" title="Sitemap" href="https://yourdomain.com/sitemap.xml"/>
-
-<!-- Open Graph -->
-<meta property="og:title" content="MoodFood - Mood Based Food Suggestions"/>
-<meta property="og:description" content="Personalized food ideas by mood & health. 50+ foods per mood, 50+ health modifiers. Try it now!"/>
-<meta property="og:type" content="website"/>
-<meta property="og:url" content="https://yourdomain.com/"/>
-<meta property="og:image" content="https://yourdomain.com/thumbnail.png"/>
-
-<!-- Twitter Card -->
-<meta name="twitter:card" content="summary_large_image"/>
-<meta name="twitter:title" content="MoodFood - Mood Based Food Suggestions"/>
-<meta name="twitter:description" content="Get 50+ mood-based foods & 50+ health-wise modifiers for a smarter diet."/>
-<meta name="twitter:image" content="https://yourdomain.com/thumbnail.png"/>
-
-<!-- Performance hints -->
-<link rel="preconnect" href="https://fonts.googleapis.com" />
-<link rel="preconnect" href="https://fonts.gstatic.com" crossorigin />
-
-<!-- JSON-LD: WebApplication -->
-<script type="application/ld+json">
-{
-  "@context":"https://schema.org",
-  "@type":"WebApplication",
-  "name":"MoodFood",
-  "url":"https://yourdomain.com/",
-  "description":"50+ mood-based food ideas with 50+ health modifiers for Diabetes, High BP, Low BP, PCOS, Thyroid, Weight Loss, Heart Issues.",
-  "applicationCategory":"FoodApplication",
-  "operatingSystem":"Web Browser",
-  "creator":{"@type":"Person","name":"Manish Yadav"}
-}
-</script>
-
-<!-- JSON-LD: FAQPage (boost SEO for questions) -->
-<script type="application/ld+json">
-{
- "@context":"https://schema.org",
- "@type":"FAQPage",
- "mainEntity":[
-  {"@type":"Question","name":"MoodFood kya karta hai?","acceptedAnswer":{"@type":"Answer","text":"MoodFood aapke mood aur health condition ke hisaab se khane ki recommendations deta hai."}},
-  {"@type":"Question","name":"Kya ye diabetes/high BP ke liye options deta hai?","acceptedAnswer":{"@type":"Answer","text":"Haan, har health condition ke liye 50+ safe-style modifiers diye gaye hain."}},
-  {"@type":"Question","name":"Kya mai ek baar me multiple suggestions le sakta hoon?","acceptedAnswer":{"@type":"Answer","text":"Haan, slider se 1 se 5 tak suggestions ek saath le sakte hain."}}
- ]
-}
-</script>
-""", unsafe_allow_html=True)
+# ---------------- Strong SEO + Custom CSS (3D UI) ----------------
+# Built from moodfood/web by `python -m moodfood.assets`: the head is minified
+# once per process and the stylesheet is a content-hashed file in ./static.
+@st.cache_resource
+def get_assets():
+    return load_assets()
 
-# ---------------- Custom CSS (3D UI) ----------------
-st.markdown("""
-<style>
-:root { --card:#ffffff; --ink:#0f172a; --muted:#475569; --bg1:#f8fbff; --bg2:#e9f6ff; --brand:#ef4444; }
-.stApp { background: radial-gradient(1000px 600px at 20% 0%, var(--bg1), var(--bg2)); }
-
-/* headings readable on light bg */
-h1,h2,h3 { text-align:center; font-family: 'Poppins', system-ui, -apple-system, Segoe UI, Roboto, Ubuntu; color: var(--ink); text-shadow: 0 1px 0 rgba(255,255,255,.8); }
-.small { opacity:.9; text-align:center; margin-top:-8px; color: var(--muted); }
-
-.panel { background: rgba(255,255,255,0.95); border-radius:18px; padding:18px; box-shadow: 0 12px 30px rgba(0,0,0,0.12); border:1px solid rgba(15,23,42,.06); }
-.rec-card {
-  background: var(--card);
-  border-radius: 16px;
-  padding: 16px 18px;
-  margin: 10px 0;
-  box-shadow: 0 10px 24px rgba(20, 60, 90, 0.18);
-  border: 1px solid rgba(0,0,0,0.06);
-  transition: transform .18s ease, box-shadow .18s ease;
-  color: var(--ink);
-}
-.rec-card:hover { transform: translateY(-4px); box-shadow: 0 16px 36px rgba(20, 60, 90, 0.25); }
-.badge { display:inline-block; padding:2px 8px; border-radius:999px; font-size:12px; background:#eef7ff; border:1px solid #d5ecff; margin-left:6px; color:#0b3a64; }
-
-.search-box {
-  background: linear-gradient(180deg, rgba(255,255,255,.96), rgba(255,255,255,.9));
-  backdrop-filter: blur(10px);
-  border: 1px solid rgba(0,0,0,0.08);
-  border-radius: 18px; padding: 16px;
-  box-shadow: 0 12px 28px rgba(0,0,0,0.15);
-  color: var(--ink);
-}
-
-/* ★ New: SEO-friendly, readable footer */
-.footer-wrap { display:flex; justify-content:center; margin:32px 0 10px; }
-.footer {
-  background: rgba(255,255,255,.92);
-  border: 1px solid rgba(15,23,42,.08);
-  border-radius: 14px;
-  padding: 10px 16px;
-  box-shadow: 0 10px 28px rgba(0,0,0,.14);
-  max-width: 820px; width: 100%;
-}
-.footer .links { text-align:center; font-weight:600; }
-.footer .links a {
-  color: var(--ink); text-decoration:none; padding:0 8px;
-}
-.footer .links a:hover { text-decoration:underline; }
-.footer .copy { text-align:center; color: var(--muted); font-size:13px; margin-top:4px; }
-.footer .dot { color:#94a3b8; padding:0 4px; }
-.badge-domain {
-  display:inline-block; background:#e2f7ee; color:#065f46; border:1px solid #a7f3d0;
-  padding:2px 6px; border-radius:8px; font-size:12px; margin-left:6px;
-}
-</style>
-""", unsafe_allow_html=True)
+with metrics.phase("head"):
+    seo_head, css_tag = get_assets()
+    st.markdown(seo_head + css_tag, unsafe_allow_html=True)
 
 
 # ---------------- App Title ----------------
@@ -128,337 +64,379 @@ st.markdown("<h1>🍲 MoodFood App</h1>", unsafe_allow_html=True)
 st.markdown("<p class='small'>Get quick food suggestions based on your mood & health</p>", unsafe_allow_html=True)
 
 # ---------------- Session States ----------------
-if "favorites" not in st.session_state: st.session_state["favorites"] = []
-if "last" not in st.session_state: st.session_state["last"] = []
-
-# ---------------- Inputs ----------------
-with st.container():
-    c1, c2, c3 = st.columns([1,1,1])
-    with c1:
-        mood = st.selectbox(
-            "Your Mood Today",
-            ['Happy','Sad','Stressed','Angry','Tired','Excited','Relaxed','Anxious','Bored'],
-            help="Select your current mood"
-        )
-    with c2:
-        health = st.selectbox(
-            "Health Condition",
-            ['None','Diabetes','High BP','Low BP','PCOS','Thyroid','Weight Loss','Heart Issues'],
-            help="Pick a condition to tailor suggestions"
-        )
-    with c3:
-        count = st.slider("How many suggestions?", 1, 5, 3, help="Get 1–5 ideas at once")
+# Favorites persist in SQLite, keyed by a per-browser id kept in the URL.
+# Only ids of the shape we hand out are accepted from the URL, so ?uid= can
+# never name a signed-in account ("google:<sub>").
+ANON_UID = re.compile(r"[0-9a-f]{32}")
+
+@st.cache_resource
+def get_favorites_store():
+    return FavoritesStore()
+
+if "uid" not in st.session_state:
+    requested = st.query_params.get("uid", "")
+    st.session_state["uid"] = requested if ANON_UID.fullmatch(requested) else uuid.uuid4().hex
+    st.query_params["uid"] = st.session_state["uid"]
+uid = st.session_state["uid"]
+favorites = get_favorites_store()
+FAV_PAGE_SIZE = 10
+
+# Latest picks and the rotation live in shared state (Redis when `redis_url`
+# is set), not st.session_state, so any worker can serve the user's next rerun.
+@st.cache_resource
+def get_state():
+    state = make_state(st.secrets)
+    get_metrics().track_cache("state", lambda: (state.hits + state.revalidated, state.misses))
+    return state
+
+shared = get_state()
+
+def load_picks():
+    picks = shared.get(f"picks:{uid}")
+    if not picks:
+        return None
+    return [Recommendation(*rec) for rec in picks["recs"]], picks["mood"], picks["health"]
+
+# ---------------- Sign-in (Google) ----------------
+# Signed-in users get a profile and favorites that follow them across devices.
+# The ID token is verified once; later reruns hit the verifier's claim cache.
+@st.cache_resource
+def get_auth():
+    from moodfood.auth import make_auth
+    return make_auth(st.secrets)
+
+@st.cache_resource
+def get_profile_store():
+    from moodfood.profiles import ProfileStore
+    return ProfileStore()
+
+def sign_out():
+    st.session_state.pop("id_token", None)
+    st.session_state.pop("profile", None)
+
+def sign_out_clicked():
+    clicked("sign_out")
+    sign_out()
+
+auth = get_auth()
+profile = None
+with metrics.phase("auth"):
+    if auth is not None:
+        from moodfood.auth import STATE_COOKIE, AuthError
+        # Sign-in state is bound to this browser's sign-in cookie, so a link with
+        # someone else's code can't sign this browser into their account.
+        binding = st.context.cookies.get(STATE_COOKIE)
+        if "code" in st.query_params:
+            if auth.check_state(st.query_params.get("state"), binding):
+                try:
+                    st.session_state["id_token"], _ = auth.exchange(st.query_params["code"])
+                except AuthError:
+                    st.error("Google sign-in failed, please try again.")
+            else:
+                st.error("That sign-in link has expired or was started in another browser, please sign in again.")
+            for key in ("code", "state", "scope", "authuser", "prompt", "hd"):
+                if key in st.query_params:
+                    del st.query_params[key]
+        if "id_token" in st.session_state:
+            try:
+                claims = auth.verify(st.session_state["id_token"])
+            except AuthError:
+                sign_out()
+            else:
+                uid = f"google:{claims['sub']}"
+                if "profile" not in st.session_state:
+                    st.session_state["profile"] = get_profile_store().sign_in(
+                        uid, claims.get("email"), claims.get("name"))
+                profile = st.session_state["profile"]
+        with st.sidebar:
+            if profile:
+                st.markdown(f"👋 **{profile.name or profile.email}**")
+                st.button("Sign out", on_click=sign_out_clicked)
+            else:
+                if not binding:
+                    binding = st.session_state.setdefault("signin_binding", uuid.uuid4().hex)
+                    secure = "; Secure" if auth.redirect_uri.startswith("https://") else ""
+                    st.html(f"<script>document.cookie = '{STATE_COOKIE}={binding}; path=/; "
+                            f"max-age=31536000; SameSite=Lax{secure}';</script>",
+                            unsafe_allow_javascript=True)
+                try:
+                    st.link_button("🔐 Sign in with Google", auth.authorize_url(binding))
+                except AuthError:
+                    # provider unreachable: the rest of the page still works
+                    st.caption("Google sign-in is unavailable right now.")
 
 # ---------------- Datasets (50+ each) ----------------
-recipes = {
-    'Happy': [
-        'Colorful Fruit Salad','Vegetable Pasta','Ice Cream','Smoothie Bowl','Fresh Juice',
-        'Yogurt Parfait','Avocado Toast','Berry Mix','Dark Chocolate','Sweet Potato Fries',
-        'Fresh Spring Rolls','Fruit Chaat','Pani Puri','Bhel Puri','Sev Puri',
-        'Dahi Puri','Pav Bhaji','Vada Pav','Samosa','Kachori',
-        'Jalebi','Gulab Jamun','Rasgulla','Rasmalai','Lassi',
-        'Mango Shake','Butter Chicken','Chicken Tikka','Paneer Tikka','Veg Biryani',
-        'Pulao','Fried Rice','Chole Bhature','Rajma Chawal','Dal Makhani',
-        'Butter Naan','Garlic Naan','Aloo Paratha','Gobi Paratha','Masala Dosa',
-        'Uttapam','Idli Sambar','Medu Vada','Rava Dosa','Pongal',
-        'Upma','Poha','Khaman Dhokla','Khandvi','Misal Pav',
-        'Dabeli','Kathi Roll','Frankie','Paneer Bhurji','Veg Sandwich'
-    ],
-    'Sad': [
-        'Comfort Soup','Grilled Cheese','Mashed Potatoes','Hot Chocolate','Warm Milk',
-        'Oatmeal','Khichdi','Dal Rice','Ghee Rice','Kheer',
-        'Sooji Halwa','Moong Dal Khichdi','Curd Rice','Kadhi Chawal','Sambar Rice',
-        'Rasam Rice','Yellow Dal','Tomato Soup','Sweet Corn Soup','Badam Milk',
-        'Kesar Milk','Rava Kesari','Appam','Puttu','Adai',
-        'Pesarattu','Jowar Roti','Bajra Roti','Makki ki Roti','Thepla',
-        'Khakhra','Papad with Ghee','Achaar Rice','Raita Bowl','Yogurt with Honey',
-        'Chaas','Buttermilk','Nimbu Pani','Shikanji','Aam Panna',
-        'Kokum Sherbet','Veg Stew','Soft Idli','Butter Maggi','Veg Porridge',
-        'Veg Upma','Soft Paratha with Curd','Paneer Pulao','Sabudana Khichdi','Moong Dal Soup'
-    ],
-    'Stressed': [
-        'Herbal Tea','Green Tea','Dark Chocolate','Nuts Mix','Seeds Mix',
-        'Banana','Oatmeal','Yogurt','Leafy Greens Salad','Grilled Salmon',
-        'Whole Grain Khichdi','Fresh Fruits Bowl','Chamomile Tea','Tulsi Tea','Ginger Tea',
-        'Lemon Tea','Turmeric Milk','Warm Water','Coconut Water','Vegetable Juice',
-        'Kosambari','Sprouts Salad','Moong Salad','Chana Salad','Fruit Chaat',
-        'Vegetable Chaat','Steamed Vegetables','Boiled Vegetables','Grilled Vegetables','Baked Vegetables',
-        'Steamed Rice','Boiled Chicken','Grilled Fish','Baked Fish','Tandoori Paneer',
-        'Phulka Roti','Chapati','Ragi Mudde','Millet Khichdi','Quinoa Salad',
-        'Brown Rice Bowl','Hummus with Veggies','Roasted Chana','Makhana','Pumpkin Soup',
-        'Tomato Basil Soup','Broccoli Soup','Khichdi with Ghee','Sweet Potato Mash','Masala Oats'
-    ],
-    'Angry': [
-        'Cooling Juice','Cucumber Salad','Mint Lemonade','Plain Yogurt','Cold Smoothie',
-        'Fresh Salad','Green Vegetables','Coconut Water','Watermelon','Muskmelon',
-        'Buttermilk','Curd Rice','Cucumber Raita','Mint Chutney Sandwich','Coriander Chutney Dosa',
-        'Tomato Cucumber Sandwich','Coconut Chutney Idli','Green Mango Chutney Roll','Tamarind Rice','Lemon Rice',
-        'Coconut Rice','Puliyogare','Bisi Bele Bath','Sambar','Rasam',
-        'Kootu','Porial','Thoran','Aviyal','Olan',
-        'Parippu Curry','Mor Kuzhambu','Kadhi','Neer Mor','Sambharam',
-        'Barley Water','Sabja Water','Aam Panna','Pudina Rice','Veg Raita',
-        'Lauki Raita','Beet Raita','Cucumber Sticks','Celery Sticks','Coconut Lassi'
-    ],
-    'Tired': [
-        'Energy Smoothie','Banana Shake','Nuts Mix','Dates','Dry Fruits',
-        'Protein Shake','Boiled Eggs','Peanut Butter Toast','Whole Grain Bread','Brown Rice Bowl',
-        'Lentil Soup','Chicken Soup','Mutton Soup','Vegetable Soup','Fruit Smoothie',
-        'Green Smoothie','Detox Juice','Electrolyte Drink','Kanji','Fermented Rice Water',
-        'Ragi Malt','Jowar Upma','Bajra Khichdi','Multigrain Paratha','Red Rice Bowl',
-        'Quinoa Pulao','Millet Dosa','Buckwheat Khichdi','Amaranth Porridge','Barley Khichdi',
-        'Oats Upma','Granola with Curd','Muesli Bowl','Trail Mix','Energy Bars',
-        'Protein Bars','Date Bars','Peanut Chikki','Til Chikki','Sesame Ladoo',
-        'Dry Fruit Ladoo','Besan Ladoo','Sattu Drink','Sattu Paratha','Sprouts Poha',
-        'Paneer Sandwich','Egg Bhurji','Boiled Sweet Corn','Chickpea Salad','Paneer Wrap'
-    ],
-    'Excited': [
-        'Spicy Food Platter','Tangy Salad','Chatpata Mix','Street Style Chaat','Tangy Juice',
-        'Spicy Noodles','Bhel Puri','Pani Puri','Masala Fries','Spicy Curry',
-        'Mirchi Bajji','Onion Bajji','Potato Bajji','Chilli Chicken','Chilli Paneer',
-        'Gobi Manchurian','Baby Corn Manchurian','Veg Manchurian','Chicken Manchurian','Schezwan Noodles',
-        'Schezwan Rice','Schezwan Fried Rice','Schezwan Paneer','Hakka Noodles','Manchow Soup',
-        'Hot and Sour Soup','Thai Green Curry','Red Curry','Tom Yum Soup','Pad Thai',
-        'Drunken Noodles','Basil Fried Rice','Vietnamese Pho','Banh Mi','Spring Rolls',
-        'Summer Rolls','Kimchi Fried Rice','Bibimbap','Tteokbokki','Teriyaki Chicken',
-        'Teriyaki Paneer','Katsu Curry','Ramen','Udon Stir-fry','Yakitori',
-        'Mexican Tacos','Burrito Bowl','Quesadilla','Nachos Supreme','Peri Peri Wrap'
-    ],
-    'Relaxed': [
-        'Warm Soup','Herbal Tea','Light Salad','Steamed Vegetables','Grilled Fish',
-        'Boiled Eggs','Fresh Juice','Fruit Bowl','Green Salad','Sprouts',
-        'Boiled Corn','Roasted Chicken','White Tea','Oolong Tea','Blooming Tea',
-        'Fruit Tea','Decaf Coffee','Golden Milk','Turmeric Latte','Matcha Latte',
-        'Smoothie Bowl','Acai Bowl','Porridge','Congee','Clear Broth',
-        'Steamed Dumplings','Veg Momos','Spring Rolls','Sushi (Veg)','Cucumber Sushi',
-        'Ceviche (veg alt)','Zoodles with Pesto','Crudites with Dip','Hummus Platter','Cheese Board (light)',
-        'Fruit Platter','Charcuterie (light)','Antipasto','Mezze Platter','Tapas (light)',
-        'Caprese Salad','Greek Salad','Quinoa Bowl','Lemon Coriander Soup','Pumpkin Soup',
-        'Corn Soup','Spinach Soup','Tomato Basil Soup','Clear Veg Stew','Khichdi with Ghee'
-    ],
-    'Anxious': [
-        'Chamomile Tea','Warm Milk','Banana','Oats Bowl','Nuts',
-        'Seeds','Leafy Greens','Berries','Dark Chocolate (small)','Yogurt',
-        'Whole Grains','Lavender Tea','Passionflower Tea','Lemon Balm Tea','Valerian Tea',
-        'Magnesium-rich Mix','Zinc-rich Mix','Vitamin B-rich Bowl','Omega-3 Mix','Tryptophan Snack',
-        'Complex Carbs Plate','Lean Protein Plate','Healthy Fats Plate','Fermented Foods','Probiotic Yogurt',
-        'Prebiotic Salad','Bone Broth (veg alt ok)','Collagen Soup (veg alt)','Arrowroot Porridge','Sabudana Khichdi',
-        'Water Chestnut Stir-fry','Lotus Seed (Makhana)','Sunflower Seed Mix','Pumpkin Seed Mix','Flaxseed Mix',
-        'Chia Pudding','Hemp Seed Mix','Sesame Mix','Basil (Sabja) Seeds','Fenugreek Water',
-        'Coriander Water','Cumin Water','Warm Lemon Water','Ginger Lemon Honey','Sprout Salad',
-        'Moong Chilla','Besan Chilla','Veg Dalia','Masala Oats','Spinach Khichdi'
-    ],
-    'Bored': [
-        'Try New Cuisine','Fusion Dish','Unique Smoothie','Creative Buddha Bowl','Food Combo',
-        'DIY Taco Night','DIY Sushi (Veg)','DIY Pizza Night','DIY Wrap Bar','Molecular Twist (safe)',
-        'Deconstructed Chaat','Reconstructed Dosa','Modernist Raita','Artistic Plating Salad','Edible Flowers Salad',
-        'Microgreens Toast','Sprouted Seeds Mix','Wild Greens (safe)','Heirloom Tomato Salad','Ancient Grains Bowl',
-        'Heritage Millet Khichdi','Regional Specialty Thali','Seasonal Special Salad','Festival Sweet (light)','Ceremonial Pongal',
-        'Prasad Style Sheera','Meditative Kitchari','Yogic Satvic Thali','Ayurvedic Khichdi','Sattvic Pulao',
-        'Rajasic Stir-fry (light)','Tamasic Avoid List (info)','Traditional Varieties Platter','Local Street Sampler','Pickle Tasting (mild)',
-        'Fermentation Trial (curd)','New Spice Blend Trial','Roast-taste Test','No-recipe Cooking','5-ingredient Challenge',
-        'Color-only Plate','Texture-only Plate','Breakfast-for-Dinner','Tapas Flight','Mezze Flight',
-        'Pan-Asian Sampler','Tex-Mex Sampler','Middle-East Sampler','Mediterranean Bowl','Korean Bowl'
-    ],
-}
-
-health_modifiers = {
-    'Diabetes': [
-        'Sugar-free ','Low-glycemic ','High-fiber ','Diabetic-friendly ','Blood-sugar balancing ',
-        'Carb-controlled ','No-added-sugar ','Stevia-sweetened ','Low-carb ','Insulin-sensitive ',
-        'Whole-grain ','Vegetable-rich ','Protein-packed ','Low-fat ','Natural-sweetener ',
-        'Millet-based ','Brown-rice ','Oats-based ','Barley-based ','Quinoa-based ',
-        'Chia-seed ','Flaxseed ','Nut-enriched ','Seed-enriched ','Greek-yogurt ',
-        'Low-fat paneer ','Green-tea infused ','Cinnamon-spiced ','Fenugreek-rich ','Bitter-gourd infused ',
-        'Drumstick-leaf ','Spinach-rich ','Broccoli-based ','Tomato-based ','Okra-based ',
-        'Cabbage-rich ','Cauliflower-based ','Pumpkin-based ','Zucchini-rich ','Brinjal-based ',
-        'Carrot-rich ','Beetroot-rich ','Sprouts-rich ','Low-oil ','Air-fried ',
-        'Portion-controlled ','Slow-release carbs ','Evenly-balanced plate ','Hydration-focused ','Post-meal walk friendly '
-    ],
-    'High BP': [
-        'Low-sodium ','Potassium-rich ','Heart-healthy ','Hypertension-friendly ','Vasodilating ',
-        'Nitric-oxide boosting ','Magnesium-rich ','Calcium-aware ','No-added-salt ','Sodium-aware ',
-        'Cardio-friendly ','Cholesterol-lowering ','Triglyceride-reducing ','Anti-hypertensive ','Vascular-friendly ',
-        'Nitrate-rich ','Beetroot-enhanced ','Garlic-infused ','Celery-rich ','Pomegranate-enriched ',
-        'Berry-infused ','Omega-3 enriched ','CoQ10-aware ','Olive-oil dressed ','Leafy-green loaded ',
-        'Whole-grain base ','Legume-forward ','Low-fat dairy ','Herb-seasoned ','Low-sauce ',
-        'Steam-cooked ','Grilled ','Baked ','Air-fried ','High-fiber ',
-        'Salt-free masala ','Citrus-zest ','Potassium-sodium balance ','Hydrating ','No-pickle ',
-        'No-papad add-on ','Low-processed ','No-MSG ','Mindful-portion ','Post-meal relaxation '
-    ],
-    'Low BP': [
-        'Lightly salted ','Healthy salted ','Electrolyte-rich ','Mineral-rich ','Sodium-balanced ',
-        'Hydrating ','Volume-supporting ','Energy-dense ','Iron-rich ','B12-rich ',
-        'Folate-rich ','Protein-rich ','Healthy-fat rich ','Complex-carb rich ','Calorie-dense ',
-        'Banana-added ','Dates-added ','Raisin-enriched ','Salted buttermilk ','Salt-lime water ',
-        'Soup-broth ','Veg stew ','Sea-salt pinch ','Rock-salt pinch ','Balanced spice ',
-        'Ginger-lime ','Cumin-water ','Jeera rice style ','Beet-carrot mix ','Nuts & seeds ',
-        'Egg-protein ','Paneer-protein ','Lentil-forward ','Whole-grain base ','Yogurt-based ',
-        'Fermented drink ','Coconut water ','ORS-style homemade ','Small frequent meals ','No long fasting ',
-        'Iron + C combo ','Warm beverages ','Avoid sudden standing ','Steady carb release ','Mid-meal snack '
-    ],
-    'PCOS': [
-        'High-fiber ','Low-carb ','Protein-rich ','PCOS-friendly ','Hormone-balancing ',
-        'Insulin-sensitive ','Anti-inflammatory ','Antioxidant-rich ','Omega-3 rich ','Low-glycemic ',
-        'Blood-sugar stabilizing ','Estrogen-balancing ','Androgen-aware ','Cortisol-balancing ','Thyroid-supporting ',
-        'Adrenal-supporting ','Liver-supporting ','Detox-friendly ','Gut-healthy ','Probiotic-rich ',
-        'Prebiotic-rich ','Low-dairy focus ','Dairy-free option ','Gluten-aware ','Soy-aware ',
-        'Processed-food-free ','Natural ','Whole-food ','Millet-forward ','Legume-forward ',
-        'Leafy-green loaded ','Cruciferous blend ','Berry-rich ','Seed-cycling aware ','Zinc-rich ',
-        'Magnesium-rich ','Vitamin-D aware ','Inositol-supporting ','Cinnamon-spiced ','Fenugreek hint ',
-        'Spearmint-tea pairing ','Steady carb release ','Portion-smart ','Stress-aware timing ','Sleep-supportive '
-    ],
-    'Thyroid': [
-        'Iodine-aware ','Selenium-rich ','Balanced ','Thyroid-supporting ','Hypothyroid-friendly ',
-        'Hyperthyroid-friendly ','Goitrogen-aware ','Metabolism-supporting ','Energy-boosting ','Weight-management ',
-        'Temperature-regulating ','Hormone-balancing ','Immune-modulating ','Anti-inflammatory ','Antioxidant-rich ',
-        'Zinc-rich ','Iron-aware ','Copper-aware ','Manganese-aware ','Vitamin-D aware ',
-        'Vitamin-A aware ','Omega-3 rich ','Tyrosine-aware ','Protein-rich ','Amino-acid aware ',
-        'Nutrient-dense ','Easy-digesting ','Seafood-aware (or iodized salt) ','Egg-inclusive ','Brazil-nut hint ',
-        'Dairy-moderate ','Soy-moderate ','Cruciferous cooked ','Gluten-aware ','Selenium (dal/lentil) ',
-        'Millet-moderate ','Hydration focus ','Regular meal timing ','B12 support ','Folate support ',
-        'Iron + C combo ','Warm meals ','Less ultra-processed ','Low-sugar ','Whole-grain base '
-    ],
-    'Weight Loss': [
-        'Low-calorie ','High-protein ','Light ','Weight-loss friendly ','Fat-burning ',
-        'Metabolism-boosting ','Appetite-managing ','Satiety-promoting ','High-volume ','Water-rich ',
-        'Fiber-rich ','Lean-protein ','Low-fat ','Low-sugar ','Low-carb ',
-        'Ketogenic-friendly ','Calorie-controlled ','Portion-controlled ','Mindful-eating ','Slow-digesting ',
-        'Thermogenic spices ','Fat-oxidizing ','Muscle-preserving ','Non-fried ','Air-fried ',
-        'Steam-cooked ','Baked ','Grilled ','No refined sugar ','Whole-food ',
-        'Minimal oil ','Millet-forward ','Legume-forward ','Veg-loaded ','Soup-first ',
-        'Plate-method ','Walk-after-meal ','Hydration-first ','Protein-first breakfast ','No late-night snacking ',
-        'Smart snack ','No sugary drinks ','High-fiber roti ','Brown rice swap ','Quinoa swap '
-    ],
-    'Heart Issues': [
-        'Heart-healthy ','Low-fat ','Cholesterol-aware ','Cardio-friendly ','Artery-friendly ',
-        'Omega-3 rich ','Anti-clotting aware ','Blood-pressure friendly ','LDL-lowering style ','HDL-supporting ',
-        'Triglyceride-reducing ','Anti-atherosclerotic ','Steady sodium ','High-fiber ','Whole-grain ',
-        'Legume-forward ','Olive-oil dressed ','Nuts-in-moderation ','Berries-added ','Leafy-green loaded ',
-        'Garlic hint ','Turmeric hint ','Ginger hint ','Low-processed ','Low-sugar ',
-        'No trans-fat ','Minimal saturated fat ','Baked/Grilled ','Steam-cooked ','Air-fried ',
-        'Portion-smart ','Mediterranean-inspired ','DASH-inspired ','Salt-free masala ','No deep-fry ',
-        'Avocado-in-moderation ','Oat-beta-glucan ','Stanols-aware ','CoQ10-aware ','Magnesium-aware ',
-        'Potassium-aware ','Vitamin K1 leafy ','Hydration focus ','After-meal walk ','Stress-reduction pair '
-    ],
-    'None': ['']*50
-}
-
-fun_facts = [
-    "🍌 Bananas can support a better mood day-to-day.",
-    "🥗 Leafy greens are linked with lower stress.",
-    "🍫 A small piece of dark chocolate may help you unwind.",
-    "🥛 Warm, lightly sweetened milk can feel soothing.",
-    "🥣 High-fiber bowls keep energy stable longer."
-]
-
-# ---------------- Actions ----------------
-st.markdown("<div class='panel'>", unsafe_allow_html=True)
-if st.button("🍽️ Get Food Recommendations", type="primary", use_container_width=True):
-    if mood in recipes:
-        chosen = random.sample(recipes[mood], k=count)
-        st.session_state["last"] = []
-        for food in chosen:
-            mod_food = food
-            if health != 'None':
-                modifier = random.choice(health_modifiers[health]).strip()
-                # presentable: modifier + Title Case food
-                mod_food = (modifier + food.lower()).strip()
-            st.session_state["last"].append(mod_food)
-            st.markdown(
-                f"<div class='rec-card'>"
-                f"✅ <b>{mod_food}</b>"
-                f"<span class='badge'>{mood}</span>"
-                f"<span class='badge'>{health}</span><br>"
-                f"<small>{random.choice(fun_facts)}</small>"
-                f"</div>", unsafe_allow_html=True
+# Compiled once per process from moodfood/catalog.json and shared by every
+# session; edits to the file are picked up on the next rerun.
+@st.cache_resource
+def get_catalog_loader():
+    return CatalogLoader()
+
+# Search index is rebuilt only when the catalog version changes, never per keystroke.
+@st.cache_resource(max_entries=2, hash_funcs={Catalog: lambda c: c.version})
+def get_search_index(catalog):
+    from moodfood.search import SearchIndex
+    return SearchIndex(catalog)
+
+# ---------------- Recommendations ----------------
+# Fragments: widgets inside a panel rerun (and re-send) only that panel, not
+# the SEO head, CSS and the rest of the page.
+def render_cards(recs, mood, health, nutrition=None):
+    # one HTML payload for the whole card list
+    nutrition = nutrition or {}
+    return "".join(
+        f"<div class='rec-card'>"
+        f"✅ <b>{rec.label}</b>"
+        f"<span class='badge'>{mood}</span>"
+        f"<span class='badge'>{health}</span><br>"
+        + (f"<small>{nutrition[rec.dish].summary()}</small><br>" if nutrition.get(rec.dish) else "")
+        + f"<small>{rec.fact}</small>"
+        f"</div>"
+        for rec in recs
+    )
+
+# Edamam/USDA nutrition, if keys are configured; None disables it.
+@st.cache_resource
+def get_nutrition_client():
+    from moodfood.nutrition import make_client
+    client = make_client(st.secrets)
+    if client is not None:
+        memory = client.cache.memory
+        get_metrics().track_cache("nutrition", lambda: (memory.hits, memory.misses))
+    return client
+
+# Gemini explanations (cached per mood/health/dish); None when no API key.
+@st.cache_resource
+def get_explainer():
+    from moodfood.explain import make_explainer
+    explainer = make_explainer(st.secrets)
+    if explainer is not None:
+        cache = explainer.cache
+        get_metrics().track_cache("explanations", lambda: (cache.hits, cache.misses))
+    return explainer
+
+def save_favorite(label):
+    clicked("save_favorite")
+    st.session_state["saved_msg"] = (
+        ("success", "Added to Favorites!") if favorites.add(uid, label)
+        else ("info", "Already in your favorites.")
+    )
+
+# Per-user shuffle bag: no dish repeats for a (mood, health) pair until all were shown.
+@st.cache_resource
+def get_rotation():
+    from moodfood.rotation import Rotation
+    return Rotation()
+
+# Compatibility matrix; on a catalog reload only the changed slabs are rebuilt.
+@st.cache_resource
+def get_scorer():
+    from moodfood.scoring import Scorer
+    return Scorer()
+
+def default_index(options, value):
+    return options.index(value) if value in options else 0
+
+def save_defaults(mood, health):
+    clicked("save_defaults")
+    user_id = st.session_state["profile"].user_id
+    st.session_state["profile"] = get_profile_store().set_defaults(user_id, mood, health)
+
+@st.fragment
+def recommendation_panel():
+    metrics.inc("moodfood_runs_total", scope="recommendations")
+    with metrics.phase("catalog"):
+        catalog = get_catalog_loader().get()
+    with st.container():
+        c1, c2, c3 = st.columns([1,1,1])
+        with c1:
+            mood = st.selectbox(
+                "Your Mood Today",
+                catalog.moods,
+                index=default_index(catalog.moods,
+                                    st.query_params.get("mood") or (profile and profile.default_mood)),
+                help="Select your current mood"
+            )
+        with c2:
+            health = st.selectbox(
+                "Health Condition",
+                catalog.conditions,
+                index=default_index(catalog.conditions,
+                                    st.query_params.get("health") or (profile and profile.default_health)),
+                help="Pick a condition to tailor suggestions"
             )
-            if st.button(f"⭐ Save: {food}", key=f"save_{food}"):
-                st.session_state["favorites"].append(mod_food)
-                st.success("Added to Favorites!")
-    else:
-        st.error("Please select a mood to get recommendations")
-st.markdown("</div>", unsafe_allow_html=True)
+        with c3:
+            count = st.slider("How many suggestions?", 1, 5, 3, help="Get 1–5 ideas at once")
+    if profile:
+        st.button("📌 Make these my defaults", on_click=save_defaults, args=(mood, health))
+    explainer = get_explainer()
+    explain = explainer is not None and st.toggle("🤖 AI explanation", help="Why each dish suits you, written by Gemini")
+
+    st.markdown("<div class='panel'>", unsafe_allow_html=True)
+    if st.button("🍽️ Get Food Recommendations", type="primary", use_container_width=True):
+        clicked("recommend")
+        if mood in catalog.mood_id:
+            with metrics.phase("recommend"):
+                scorer = get_scorer().update(catalog)
+                rotation = get_rotation()
+                seen = shared.get(f"rotation:{uid}")
+                if seen:
+                    rotation.restore(uid, {int(pair): packed for pair, packed in seen.items()})
+                recs = recommend(mood, health, count, catalog=catalog, rotation=rotation,
+                                 user=uid, scorer=scorer)
+                shared.set(f"rotation:{uid}", rotation.export(uid))
+            shared.set(f"picks:{uid}", {"recs": recs, "mood": mood, "health": health})
+            st.session_state.pop("saved_msg", None)
+        else:
+            st.error("Please select a mood to get recommendations")
+    picks = load_picks()
+    if picks:
+        recs, rec_mood, rec_health = picks
+        nutrition_client = get_nutrition_client()
+        with metrics.phase("nutrition"):
+            nutrition = nutrition_client.enrich([rec.dish for rec in recs]) if nutrition_client else None
+        with metrics.phase("render"):
+            st.markdown(render_cards(recs, rec_mood, rec_health, nutrition), unsafe_allow_html=True)
+        for col, rec in zip(st.columns(len(recs)), recs):
+            col.button(f"⭐ Save: {rec.dish}", key=f"save_{rec.dish}",
+                       on_click=save_favorite, args=(rec.label,))
+        if "saved_msg" in st.session_state:
+            kind, msg = st.session_state.pop("saved_msg")
+            getattr(st, kind)(msg)
+        if explain:
+            # streamed below the cards so they never wait on the model
+            for rec in recs:
+                st.markdown(f"**🤖 {rec.label}**")
+                try:
+                    st.write_stream(explainer.stream(rec_mood, rec_health, rec.dish))
+                except Exception:
+                    st.caption("AI explanation is unavailable right now.")
+    st.markdown("</div>", unsafe_allow_html=True)
+
+recommendation_panel()
+
+# ---------------- Plan My Week ----------------
+# The planner's per-pool arrays are built once per catalog version.
+@st.cache_resource(max_entries=2, hash_funcs={Catalog: lambda c: c.version})
+def get_planner(catalog):
+    from moodfood.planner import Planner
+    return Planner(catalog, get_scorer())
+
+@st.fragment
+def plan_panel():
+    metrics.inc("moodfood_runs_total", scope="plan")
+    catalog = get_catalog_loader().get()
+    with st.expander("🗓️ Plan My Week"):
+        moods = st.multiselect("Mood trajectory (in order, spread over the week)", catalog.moods,
+                               max_selections=7, placeholder="e.g. Stressed, then Relaxed")
+        health = st.selectbox("Health Condition", catalog.conditions, key="plan_health",
+                              index=default_index(catalog.conditions, profile and profile.default_health))
+        gap = st.slider("Don't repeat a dish within (days)", 1, 7, 4)
+        if st.button("🗓️ Plan my week", disabled=not moods):
+            clicked("plan")
+            with metrics.phase("plan"):
+                st.session_state["plan"] = get_planner(catalog).plan(moods, health, no_repeat_days=gap)
+        plan = st.session_state.get("plan")
+        if plan:
+            from moodfood.planner import MEALS, format_plan
+            st.markdown("".join(
+                f"<div class='rec-card'><b>{day.day}</b><span class='badge'>{day.mood}</span><br>"
+                + "<br>".join(f"<small>{meal}:</small> {rec.label}" for meal, rec in zip(MEALS, day.meals))
+                + "</div>"
+                for day in plan.days
+            ), unsafe_allow_html=True)
+            if plan.relaxed:
+                st.caption("Not enough variety for every rule this week; a few dishes repeat sooner.")
+            st.download_button("⬇️ Download plan", format_plan(plan), file_name="emobite-week.txt")
+
+plan_panel()
 
 # ---------------- Favorites ----------------
-with st.expander("💖 View Saved Favorites"):
-    if st.session_state["favorites"]:
-        for i, fav in enumerate(st.session_state["favorites"], 1):
-            st.write(f"{i}. {fav}")
-    else:
-        st.caption("No favorites yet.")
+@st.fragment
+def favorites_panel():
+    metrics.inc("moodfood_runs_total", scope="favorites")
+    with st.expander("💖 View Saved Favorites"):
+        total = favorites.count(uid)
+        if total:
+            pages = (total - 1) // FAV_PAGE_SIZE + 1
+            page = st.number_input("Page", 1, pages, 1, key="fav_page") if pages > 1 else 1
+            start = (page - 1) * FAV_PAGE_SIZE
+            for i, fav in enumerate(favorites.page(uid, page - 1, FAV_PAGE_SIZE), start + 1):
+                st.write(f"{i}. {fav}")
+        else:
+            st.caption("No favorites yet.")
+        # saves happen in the recommendation panel; pull them in without a full rerun
+        if st.button("🔄 Refresh", key="fav_refresh"):
+            clicked("refresh_favorites")
+
+favorites_panel()
+
+# ---------------- Send My Picks (SMS / WhatsApp) ----------------
+# Messages go to a background Twilio queue; the script never waits on delivery.
+@st.cache_resource
+def get_delivery_queue():
+    from moodfood.messaging import make_queue
+    return make_queue(st.secrets)
+
+@st.fragment
+def send_panel():
+    queue = get_delivery_queue()
+    if queue is None:
+        return
+    with st.expander("📲 Send My Picks"):
+        phone = st.text_input("Phone number (with country code)", placeholder="+919876543210")
+        channel = st.radio("Send via", ["sms", "whatsapp"], horizontal=True,
+                           format_func={"sms": "SMS", "whatsapp": "WhatsApp"}.get)
+        what = st.radio("What to send", ["Latest picks", "Favorites"], horizontal=True)
+        if st.button("📨 Send"):
+            clicked("send")
+            from moodfood.messaging import E164
+            if what == "Latest picks":
+                picks = load_picks()
+                items, title = [rec.label for rec in picks[0]] if picks else [], "Your Emobite picks:"
+            else:
+                items, title = favorites.page(uid, 0, 20), "Your Emobite favorites:"
+            phone = phone.strip()
+            if not E164.match(phone):
+                st.error("Enter the number in international format, e.g. +919876543210")
+            elif not items:
+                st.warning("Nothing to send yet.")
+            elif wait := queue.limited(phone, sender=uid):
+                st.warning(f"That's a lot of messages for now, please try again in {wait // 60 + 1:.0f} min.")
+            elif queue.enqueue(phone, format_picks(title, items), channel, sender=uid):
+                st.success("Queued! It will arrive shortly.")
+            else:
+                st.error("We're sending a lot of messages right now, please try again in a minute.")
+        stats = queue.stats()
+        st.caption(f"Queue: {stats['depth']} waiting · {stats['sent']} sent")
+
+send_panel()
 
 # ---------------- Search (3D UI) ----------------
-with st.expander("🔍 Search Your Own Food (3D Box)"):
-    st.markdown("<div class='search-box'>", unsafe_allow_html=True)
-    q = st.text_input("Type a dish or ingredient to explore ideas…", help="Example: Paneer wrap, millet dosa, quinoa")
-    if q:
-        # no external image (as requested). Just a styled acknowledgment.
-        st.success(f"Showing ideas around **{q}**. Try combining with your mood/health for smarter picks! 🚀")
-    st.markdown("</div>", unsafe_allow_html=True)
-
-st.markdown("""
-    <style>
-        :root {
-          --primary: #00BFFF;      /* Deep Sky Blue */
-          --secondary: #FF7F50;    /* Coral Orange */
-          --background: #F0F8FF;   /* Alice Blue (light) */
-          --text-dark: #1C1C1C;    /* Dark Charcoal */
-          --success: #32CD32;      /* Lime Green */
-          --highlight: #FFD700;    /* Golden */
-        }
-
-        /* Background */
-        body {
-            background-color: var(--background);
-            color: var(--text-dark);
-        }
-
-        /* Headings / Labels */
-        h1, h2, h3, h4, h5, h6, label, .stMarkdown p, .stSelectbox label {
-            color: var(--primary) !important;
-            font-weight: 600 !important;
-        }
-
-        /* Links (Saved Favorites, Search Box) */
-        .stMarkdown a {
-            display: inline-block;
-            padding: 8px 14px;
-            border: 2px solid var(--primary);
-            border-radius: 8px;
-            margin: 8px 4px;
-            text-decoration: none !important;
-            color: var(--primary) !important;
-            font-weight: 700;
-            background-color: white;
-            box-shadow: 2px 2px 6px rgba(0, 191, 255, 0.4);
-        }
-
-        .stMarkdown a:hover {
-            background-color: var(--primary);
-            color: white !important;
-            border-color: var(--highlight);
-        }
-
-        /* Footer Box */
-        .footer-box {
-            background-color: white;
-            padding: 14px 20px;
-            border-radius: 12px;
-            box-shadow: 0px 4px 14px rgba(0,0,0,0.15);
-            text-align: center;
-            margin-top: 35px;
-            border: 2px solid var(--secondary);
-            font-weight: 700;
-            color: var(--text-dark);
-        }
-
-        /* Footer Text Strong */
-        .footer-box b {
-            color: var(--primary);
-        }
-    </style>
-""", unsafe_allow_html=True)
-
+@st.fragment
+def search_panel():
+    metrics.inc("moodfood_runs_total", scope="search")
+    with st.expander("🔍 Search Your Own Food (3D Box)"):
+        st.markdown("<div class='search-box'>", unsafe_allow_html=True)
+        q = st.text_input("Type a dish or ingredient to explore ideas…", help="Example: Paneer wrap, millet dosa, quinoa")
+        if q:
+            index = get_search_index(get_catalog_loader().get())
+            metrics.track_cache("search", index.cache_stats)
+            with metrics.phase("search"):
+                hits = index.search(q, limit=15)
+            if hits:
+                st.success(f"Showing ideas around **{q}**. Try combining with your mood/health for smarter picks! 🚀")
+                st.markdown("".join(
+                    f"<div class='rec-card'>{'🍽️' if h.kind == 'dish' else '🩺'} <b>{h.name}</b>"
+                    + "".join(f"<span class='badge'>{t}</span>" for t in h.tags)
+                    + "</div>"
+                    for h in hits
+                ), unsafe_allow_html=True)
+            else:
+                st.info(f"No dishes or modifiers match **{q}** yet.")
+        st.markdown("</div>", unsafe_allow_html=True)
+
+search_panel()
 
 # Example Footer
 st.markdown("""
@@ -467,3 +445,9 @@ st.markdown("""
 </div>
 """, unsafe_allow_html=True)
 
+if profiling:
+    dump = profiler.stop(tag=uid.replace(":", "_")[:24])
+    if dump:
+        with st.expander("⏱️ Profile of this rerun"):
+            st.caption(f"Saved to {dump[0]} (open with snakeviz or pstats)")
+            st.code(dump[1], language="text")
@@ -0,0 +1,43 @@
+"""MoodFood core: catalog, recommendations, search, scoring and planning.
+
+Nothing here imports Streamlit. Submodules load on first attribute access,
+so ``import moodfood`` is nearly free and ``from moodfood import recommend``
+pulls in only the catalog and the engine. NumPy is needed only by
+``Scorer``, ``Planner`` and ``recommend_batch``. The integrations (Gemini,
+Twilio, nutrition APIs, Google sign-in) stay in their own modules and import
+their HTTP clients when first used.
+"""
+import importlib
+
+_EXPORTS = {
+    "Catalog": "catalog",
+    "CatalogLoader": "catalog",
+    "get_catalog": "catalog",
+    "load_catalog": "catalog",
+    "Recommendation": "engine",
+    "recommend": "engine",
+    "recommend_batch": "engine",
+    "Rotation": "rotation",
+    "Hit": "search",
+    "SearchIndex": "search",
+    "Scorer": "scoring",
+    "Plan": "planner",
+    "Planner": "planner",
+    "plan_batch": "planner",
+    "format_plan": "planner",
+}
+
+__all__ = sorted(_EXPORTS)
+
+
+def __getattr__(name):
+    module = _EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(f".{module}", __name__), name)
+    globals()[name] = value  # later lookups skip __getattr__
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_EXPORTS))
@@ -0,0 +1,31 @@
+"""A long-lived asyncio loop on a daemon thread.
+
+Streamlit runs each script on its own thread with no event loop, and pooled
+async clients must stay on the loop that created them. ``BackgroundLoop``
+gives the integrations one loop per process to submit coroutines to from
+synchronous code.
+"""
+import asyncio
+import threading
+
+
+class BackgroundLoop:
+    def __init__(self, name="moodfood-aio"):
+        self.loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        asyncio.set_event_loop(self.loop)
+        self.loop.run_forever()
+
+    def submit(self, coro):
+        """Schedule ``coro``; returns a ``concurrent.futures.Future``."""
+        return asyncio.run_coroutine_threadsafe(coro, self.loop)
+
+    def run(self, coro, timeout=None):
+        return self.submit(coro).result(timeout)
+
+    def stop(self):
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self._thread.join()
@@ -0,0 +1,125 @@
+"""Static asset build for the SEO head and the app stylesheet.
+
+Sources live in ``moodfood/web``. ``build`` merges the duplicate ``:root``
+rules, minifies the CSS and writes a content-hashed copy plus a
+``manifest.json`` into the Streamlit static folder, where browsers and CDNs
+can cache it indefinitely:
+
+    python -m moodfood.assets [--out static]
+
+The app compiles the sources once per process and links the hashed stylesheet
+when the matching build is present, falling back to inlining it otherwise.
+The head HTML is minified (comments, whitespace, JSON-LD) but always inlined:
+its meta tags only count inside the page, so it gets no static file.
+"""
+import hashlib
+import json
+import re
+from pathlib import Path
+
+SRC_DIR = Path(__file__).with_name("web")
+STATIC_DIR = Path(__file__).resolve().parent.parent / "static"
+STATIC_URL = "app/static"
+HASHED = ("app.css",)  # compiled sources that are served from the static folder
+
+_CSS_COMMENT = re.compile(r"/\*.*?\*/", re.S)
+_ROOT_RULE = re.compile(r":root\s*\{([^}]*)\}")
+_HTML_COMMENT = re.compile(r"<!--.*?-->", re.S)
+_JSON_LD = re.compile(r'(<script type="application/ld\+json">)(.*?)(</script>)', re.S)
+
+
+def merge_root_rules(css):
+    """Fold every ``:root { ... }`` block into one at the top (later wins)."""
+    props = {}
+    for body in _ROOT_RULE.findall(css):
+        for decl in body.split(";"):
+            name, sep, value = decl.partition(":")
+            if sep and name.strip():
+                props[name.strip()] = value.strip()
+    if not props:
+        return css
+    merged = ":root{" + ";".join(f"{k}:{v}" for k, v in props.items()) + "}"
+    return merged + "\n" + _ROOT_RULE.sub("", css)
+
+
+def minify_css(css):
+    css = _CSS_COMMENT.sub("", css)
+    css = re.sub(r"\s+", " ", css)
+    css = re.sub(r"\s*([{};,])\s*", r"\1", css)
+    css = re.sub(r":\s+", ":", css)
+    return css.replace(";}", "}").strip()
+
+
+def minify_html(html):
+    html = _HTML_COMMENT.sub("", html)
+    html = _JSON_LD.sub(
+        lambda m: m.group(1)
+        + json.dumps(json.loads(m.group(2)), ensure_ascii=False, separators=(",", ":"))
+        + m.group(3),
+        html,
+    )
+    html = re.sub(r">\s+<", "><", html)
+    return html.strip()
+
+
+def compile_sources(src_dir=SRC_DIR):
+    """logical name -> minified content."""
+    css = (src_dir / "app.css").read_text(encoding="utf-8")
+    head = (src_dir / "head.html").read_text(encoding="utf-8")
+    return {
+        "app.css": minify_css(merge_root_rules(_CSS_COMMENT.sub("", css))),
+        "head.html": minify_html(head),
+    }
+
+
+def hashed_name(name, content):
+    digest = hashlib.sha256(content.encode("utf-8")).hexdigest()[:10]
+    stem, dot, ext = name.rpartition(".")
+    return f"{stem}.{digest}{dot}{ext}"
+
+
+def build(out_dir=STATIC_DIR, src_dir=SRC_DIR):
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    manifest = {}
+    compiled = compile_sources(src_dir)
+    for name in HASHED:
+        content = compiled[name]
+        target = hashed_name(name, content)
+        stem, _, ext = name.rpartition(".")
+        for stale in out_dir.glob(f"{stem}.*.{ext}"):
+            if stale.name != target:
+                stale.unlink()
+        (out_dir / target).write_text(content, encoding="utf-8")
+        manifest[name] = target
+    (out_dir / "manifest.json").write_text(json.dumps(manifest, indent=2) + "\n", encoding="utf-8")
+    return manifest
+
+
+def load_assets(static_dir=STATIC_DIR, src_dir=SRC_DIR):
+    """``(head_html, css_html)`` to emit on each page.
+
+    The stylesheet is linked when a build matching the current sources is in
+    ``static_dir``, otherwise it is inlined so an unbuilt checkout still works.
+    """
+    compiled = compile_sources(src_dir)
+    css_file = hashed_name("app.css", compiled["app.css"])
+    if (Path(static_dir) / css_file).is_file():
+        css = f'<link rel="stylesheet" href="{STATIC_URL}/{css_file}"/>'
+    else:
+        css = f"<style>{compiled['app.css']}</style>"
+    return compiled["head.html"], css
+
+
+def main(argv=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Build hashed static assets.")
+    parser.add_argument("--out", default=str(STATIC_DIR), help="output directory")
+    args = parser.parse_args(argv)
+    for name, target in build(args.out).items():
+        print(f"{name} -> {target}")
+
+
+if __name__ == "__main__":
+    main()
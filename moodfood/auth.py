@@ -0,0 +1,195 @@
+"""Google sign-in (OpenID Connect authorization-code flow) with cached verification.
+
+``GoogleAuth.verify`` checks an ID token's RS256 signature, issuer, audience
+and expiry once, then remembers the claims until the token expires, so the
+per-rerun check is a dictionary lookup. The discovery document and JWKS are
+cached for as long as the provider's ``Cache-Control`` allows; an unknown
+``kid`` triggers at most one early JWKS refresh per minute. Network, HTTP and
+malformed-response failures surface as ``AuthError``; after a network failure
+the provider is not asked again for ``retry_after`` seconds.
+
+``state`` is an HMAC over a nonce, its issue time and a per-browser value the
+app keeps in the ``STATE_COOKIE`` cookie. It survives the round-trip through
+Google without server-side storage, but only validates in the browser that
+started sign-in, within ``state_ttl`` seconds and only once, so a link
+carrying someone else's code and state can't sign a victim in (login CSRF).
+
+Needs ``httpx`` and ``PyJWT[crypto]``; ``make_auth`` returns ``None`` without
+them or without client credentials. ``moodfood.stubs.OIDCStub`` is a local
+provider for offline tests.
+"""
+import hashlib
+import hmac
+import re
+import secrets as _secrets
+import threading
+import time
+from urllib.parse import urlencode
+
+from .cache import TTLCache
+from .config import get_secret, installed
+
+GOOGLE_ISSUER = "https://accounts.google.com"
+STATE_COOKIE = "moodfood_signin"
+_MAX_AGE = re.compile(r"max-age=(\d+)")
+
+
+class AuthError(Exception):
+    pass
+
+
+def _max_age(response, default=3600.0):
+    match = _MAX_AGE.search(response.headers.get("cache-control", ""))
+    return float(match.group(1)) if match else default
+
+
+class GoogleAuth:
+    def __init__(self, client_id, client_secret, redirect_uri, issuer=GOOGLE_ISSUER,
+                 leeway=30.0, retry_after=30.0, state_ttl=600.0, clock=time.time):
+        import httpx
+
+        self.client_id = client_id
+        self.client_secret = client_secret
+        self.redirect_uri = redirect_uri
+        self.issuer = issuer.rstrip("/")
+        self.leeway = leeway
+        self.retry_after = retry_after
+        self.state_ttl = state_ttl
+        self.clock = clock
+        self._http = httpx.Client(timeout=10.0)
+        self._meta = TTLCache(maxsize=4, clock=clock)            # discovery doc, JWKS, outage
+        self._tokens = TTLCache(maxsize=10000, clock=clock)      # token digest -> claims
+        self._used = TTLCache(maxsize=100000, ttl=state_ttl, clock=clock)  # spent nonces
+        self._state_lock = threading.Lock()
+        self._last_refresh = 0.0
+
+    # ---- provider metadata ----
+    def _request(self, method, url, **kwargs):
+        """``(response, json)``; network, HTTP and decoding failures raise ``AuthError``."""
+        import httpx
+
+        error = self._meta.get("error")
+        if error is not None:
+            raise AuthError(f"identity provider unreachable: {error}")
+        try:
+            response = self._http.request(method, url, **kwargs)
+        except httpx.HTTPError as exc:
+            # don't make every rerun wait on a provider that is down
+            self._meta.set("error", str(exc) or type(exc).__name__, ttl=self.retry_after)
+            raise AuthError(f"identity provider unreachable: {exc}") from exc
+        if method == "GET" and response.status_code != 200:
+            raise AuthError(f"{url} returned {response.status_code}")
+        try:
+            doc = response.json()
+        except ValueError as exc:
+            raise AuthError(f"{url} returned invalid JSON") from exc
+        if not isinstance(doc, dict):
+            raise AuthError(f"{url} returned unexpected JSON")
+        return response, doc
+
+    def _endpoint(self, name):
+        try:
+            return self._discovery()[name]
+        except KeyError as exc:
+            raise AuthError(f"discovery document has no {name}") from exc
+
+    def _discovery(self):
+        doc = self._meta.get("discovery")
+        if doc is None:
+            response, doc = self._request("GET", f"{self.issuer}/.well-known/openid-configuration")
+            self._meta.set("discovery", doc, ttl=_max_age(response))
+        return doc
+
+    def _jwks(self, refresh=False):
+        keys = None if refresh else self._meta.get("jwks")
+        if keys is None:
+            import jwt
+
+            response, doc = self._request("GET", self._endpoint("jwks_uri"))
+            try:
+                keys = {k["kid"]: jwt.PyJWK(k).key for k in doc["keys"]}
+            except (KeyError, TypeError, jwt.PyJWTError) as exc:
+                raise AuthError(f"unusable JWKS: {exc}") from exc
+            self._meta.set("jwks", keys, ttl=_max_age(response))
+            self._last_refresh = self.clock()
+        return keys
+
+    def _key(self, kid):
+        key = self._jwks().get(kid)
+        if key is None and self.clock() - self._last_refresh > 60:
+            # keys rotated since we fetched them
+            key = self._jwks(refresh=True).get(kid)
+        if key is None:
+            raise AuthError(f"unknown signing key {kid!r}")
+        return key
+
+    # ---- authorization-code flow ----
+    def _sign(self, message):
+        return hmac.new(self.client_secret.encode(), message.encode(), hashlib.sha256).hexdigest()[:32]
+
+    def authorize_url(self, binding):
+        """Sign-in URL whose ``state`` only checks out for the browser holding ``binding``."""
+        nonce = _secrets.token_urlsafe(16)
+        issued = int(self.clock())
+        params = {
+            "client_id": self.client_id, "redirect_uri": self.redirect_uri,
+            "response_type": "code", "scope": "openid email profile",
+            "state": f"{nonce}.{issued}.{self._sign(f'{nonce}.{issued}.{binding}')}",
+            "prompt": "select_account",
+        }
+        return f"{self._endpoint('authorization_endpoint')}?{urlencode(params)}"
+
+    def check_state(self, state, binding):
+        """True the first time a fresh ``state`` from ``authorize_url(binding)`` comes back."""
+        nonce, issued, sig = ((state or "").split(".") + ["", ""])[:3]
+        if not (nonce and binding and issued.isdigit()):
+            return False
+        if not hmac.compare_digest(sig.encode(), self._sign(f"{nonce}.{issued}.{binding}").encode()):
+            return False
+        if not -self.leeway <= self.clock() - int(issued) <= self.state_ttl:
+            return False
+        with self._state_lock:
+            if self._used.get(nonce) is not None:
+                return False
+            self._used.set(nonce, True)
+        return True
+
+    def exchange(self, code):
+        """Trade an authorization code for a verified ID token; returns ``(token, claims)``."""
+        response, doc = self._request("POST", self._endpoint("token_endpoint"), data={
+            "code": code, "client_id": self.client_id, "client_secret": self.client_secret,
+            "redirect_uri": self.redirect_uri, "grant_type": "authorization_code",
+        })
+        if response.status_code != 200 or not isinstance(doc.get("id_token"), str):
+            raise AuthError(f"token exchange failed: {response.status_code}")
+        token = doc["id_token"]
+        return token, self.verify(token)
+
+    # ---- verification ----
+    def verify(self, token):
+        digest = hashlib.sha256(token.encode()).hexdigest()
+        claims = self._tokens.get(digest)
+        if claims is not None:
+            return claims
+        import jwt
+
+        try:
+            kid = jwt.get_unverified_header(token).get("kid")
+            claims = jwt.decode(
+                token, self._key(kid), algorithms=["RS256"], audience=self.client_id,
+                issuer=[self.issuer, self.issuer.removeprefix("https://")], leeway=self.leeway,
+            )
+        except jwt.PyJWTError as exc:
+            raise AuthError(str(exc)) from exc
+        # cached exactly as long as the token itself is valid
+        self._tokens.set(digest, claims, ttl=claims["exp"] + self.leeway - self.clock())
+        return claims
+
+
+def make_auth(secrets=None, issuer=GOOGLE_ISSUER):
+    client_id = get_secret("google_client_id", secrets)
+    client_secret = get_secret("google_client_secret", secrets)
+    base_url = get_secret("base_url", secrets, default="http://localhost:8501")
+    if not (client_id and client_secret) or not installed("httpx", "jwt", "cryptography"):
+        return None
+    return GoogleAuth(client_id, client_secret, base_url, issuer=issuer)
@@ -0,0 +1,139 @@
+"""Food catalog: compiled once per process from ``catalog.json``.
+
+The JSON file is the source of truth for moods, dishes, health modifiers and
+fun facts. ``compile_catalog`` turns it into a read-only ``Catalog`` where every
+string is interned and moods, conditions, dishes and modifiers are addressed by
+small integer IDs. ``CatalogLoader`` keeps one compiled copy around and swaps
+it out when the file's mtime changes; if the new file doesn't load (an editor
+saving it in pieces, a typo) the previous copy keeps being served.
+"""
+import json
+import os
+import sys
+import threading
+from array import array
+from pathlib import Path
+from types import MappingProxyType
+
+DEFAULT_PATH = Path(__file__).with_name("catalog.json")
+
+
+def _ids(values):
+    # compact, read-only view over uint16 IDs
+    return memoryview(array("H", values)).toreadonly()
+
+
+class Catalog:
+    __slots__ = (
+        "moods", "conditions", "dishes", "modifiers", "fun_facts",
+        "mood_id", "condition_id", "dish_id", "modifier_id",
+        "mood_dishes", "condition_modifiers", "version",
+    )
+
+    def __init__(self, moods, conditions, dishes, modifiers, fun_facts,
+                 mood_dishes, condition_modifiers, version=0):
+        self.moods = moods
+        self.conditions = conditions
+        self.dishes = dishes
+        self.modifiers = modifiers
+        self.fun_facts = fun_facts
+        self.mood_dishes = mood_dishes
+        self.condition_modifiers = condition_modifiers
+        self.mood_id = MappingProxyType({m: i for i, m in enumerate(moods)})
+        self.condition_id = MappingProxyType({c: i for i, c in enumerate(conditions)})
+        self.dish_id = MappingProxyType({d: i for i, d in enumerate(dishes)})
+        self.modifier_id = MappingProxyType({m: i for i, m in enumerate(modifiers)})
+        self.version = version
+
+    def dishes_for(self, mood):
+        dishes = self.dishes
+        return tuple(dishes[i] for i in self.mood_dishes[self.mood_id[mood]])
+
+    def modifiers_for(self, condition):
+        modifiers = self.modifiers
+        return tuple(modifiers[i] for i in self.condition_modifiers[self.condition_id[condition]])
+
+
+def compile_catalog(raw, version=0):
+    intern = sys.intern
+    dishes, dish_id = [], {}
+    modifiers, modifier_id = [], {}
+
+    def dish_ref(name):
+        name = intern(name.strip())
+        if name not in dish_id:
+            dish_id[name] = len(dishes)
+            dishes.append(name)
+        return dish_id[name]
+
+    def modifier_ref(name):
+        name = intern(name.strip())
+        if name not in modifier_id:
+            modifier_id[name] = len(modifiers)
+            modifiers.append(name)
+        return modifier_id[name]
+
+    moods = tuple(intern(m) for m in raw["moods"])
+    mood_dishes = tuple(_ids([dish_ref(d) for d in raw["moods"][m]]) for m in moods)
+    conditions = tuple(intern(c) for c in raw["health_modifiers"])
+    condition_modifiers = tuple(
+        # blank entries (the 'None' condition) mean "no modifier"
+        _ids([modifier_ref(x) for x in raw["health_modifiers"][c] if x.strip()])
+        for c in conditions
+    )
+    return Catalog(
+        moods, conditions, tuple(dishes), tuple(modifiers),
+        tuple(intern(f) for f in raw.get("fun_facts", ())),
+        mood_dishes, condition_modifiers, version,
+    )
+
+
+def load_catalog(path=DEFAULT_PATH):
+    path = Path(path)
+    version = path.stat().st_mtime_ns
+    with open(path, encoding="utf-8") as f:
+        return compile_catalog(json.load(f), version)
+
+
+class CatalogLoader:
+    """Holds the compiled catalog and recompiles it when the file changes."""
+
+    def __init__(self, path=None):
+        self.path = Path(path or os.environ.get("MOODFOOD_CATALOG") or DEFAULT_PATH)
+        self._lock = threading.Lock()
+        self._catalog = None
+        self._broken = None  # mtime of a file that failed to load
+
+    def get(self):
+        catalog = self._catalog
+        try:
+            mtime = self.path.stat().st_mtime_ns
+        except OSError:
+            # file vanished mid-edit: keep serving what we have
+            if catalog is not None:
+                return catalog
+            raise
+        if catalog is None or (catalog.version != mtime and self._broken != mtime):
+            with self._lock:
+                catalog = self._catalog
+                if catalog is None or (catalog.version != mtime and self._broken != mtime):
+                    try:
+                        catalog = self._catalog = load_catalog(self.path)
+                    except (OSError, ValueError, KeyError, TypeError, AttributeError):
+                        # half-written or invalid file: keep serving the last good
+                        # catalog and don't retry until the file changes again
+                        if catalog is None:
+                            raise
+                        self._broken = mtime
+        return catalog
+
+
+_default_loader = None
+
+
+def get_catalog():
+    """Process-wide catalog from the default loader."""
+    global _default_loader
+    if _default_loader is None:
+        _default_loader = CatalogLoader()
+    return _default_loader.get()
@@ -0,0 +1,43 @@
+"""Secrets lookup that works with ``st.secrets`` or plain environment variables.
+
+``secrets.toml`` has grown keys both at the top level and under ``[gemini]``,
+so ``get_secret`` looks in both places, then in ``MOODFOOD_<NAME>``. Template
+placeholders such as ``"YOUR_USDA_API_KEY"`` count as unset. ``installed``
+tells whether optional packages are there without importing them, so the
+``make_*`` factories stay free when an integration isn't configured.
+"""
+import os
+from importlib.util import find_spec
+
+
+def _usable(value):
+    return bool(value) and not str(value).startswith("YOUR_")
+
+
+def installed(*modules):
+    return all(find_spec(name) is not None for name in modules)
+
+
+def get_secret(name, secrets=None, default=None, section=None):
+    """``section`` restricts the lookup to one table, e.g. ``[gemini] api_key``."""
+    sources = []
+    if secrets is not None:
+        try:
+            if section:
+                sources.append(secrets.get(section) or {})
+            else:
+                sources.append(secrets)
+                sources.extend(v for v in secrets.values() if hasattr(v, "get"))
+        except Exception:
+            # st.secrets raises if no secrets file exists at all
+            sources = []
+    for source in sources:
+        try:
+            value = source.get(name)
+        except Exception:
+            continue
+        if _usable(value):
+            return value
+    env = f"{section}_{name}" if section else name
+    value = os.environ.get(f"MOODFOOD_{env.upper()}")
+    return value if _usable(value) else default
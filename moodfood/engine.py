@@ -0,0 +1,149 @@
+"""Recommendation engine, usable without Streamlit.
+
+``recommend`` serves one (mood, health, count) request the way the app always
+has: ``count`` distinct dishes for the mood, each with a random modifier for
+the health condition and a fun fact. Given a ``moodfood.rotation.Rotation``
+and a user, dishes rotate instead of being sampled independently. Given a
+``moodfood.scoring.Scorer``, dishes that clash with the health condition are
+left out and each dish gets a modifier that suits it rather than a random
+one. ``recommend_batch`` serves many plain requests at once, sampling
+dish/modifier/fact indices with NumPy per (mood, health) group instead of
+looping in Python.
+"""
+import random
+import re
+from collections import defaultdict
+from typing import NamedTuple
+
+from .catalog import get_catalog
+
+
+class Recommendation(NamedTuple):
+    dish: str
+    modifier: str
+    label: str
+    fact: str
+
+
+def _folds(dish, modifier):
+    """The modifier ends with the dish's first word ("Low-fat paneer" + "Paneer Tikka")."""
+    head, _, rest = dish.partition(" ")
+    return bool(rest) and re.split(r"[^a-z0-9]+", modifier.lower())[-1] == head.lower()
+
+
+def _label(dish, modifier):
+    # presentable: modifier + lower-cased food, saying a shared word once
+    if not modifier:
+        return dish
+    if _folds(dish, modifier):
+        return f"{modifier} {dish.partition(' ')[2].lower()}"
+    return f"{modifier} {dish.lower()}"
+
+
+def format_picks(title, items):
+    """Numbered plain-text list with the Emobite sign-off, e.g. for SMS/WhatsApp."""
+    lines = [title] + [f"{i}. {item}" for i, item in enumerate(items, 1)]
+    return "\n".join(lines) + "\n— Emobite 🍲"
+
+
+def _check(catalog, mood, health, count):
+    if mood not in catalog.mood_id:
+        raise KeyError(f"unknown mood: {mood!r}")
+    if health not in catalog.condition_id:
+        raise KeyError(f"unknown health condition: {health!r}")
+    pool = len(catalog.mood_dishes[catalog.mood_id[mood]])
+    if not 0 < count <= pool:
+        raise ValueError(f"count must be between 1 and {pool} for {mood!r}, got {count}")
+
+
+def pair_id(catalog, mood, health):
+    return catalog.mood_id[mood] * len(catalog.conditions) + catalog.condition_id[health]
+
+
+def _scored_picks(scorer, mood, health, count, rng, nrng, rotation, user, pair):
+    compatible = scorer.compatible(mood, health)
+    allowed = compatible.nonzero()[0].tolist()
+    if rotation is not None and user is not None:
+        picks = [allowed[i] for i in rotation.draw(user, pair, len(allowed), count)] if allowed else []
+    else:
+        picks = scorer.top_k(mood, health, count, rng=nrng)
+    if len(picks) < count:
+        # not enough good matches for this condition: top up from the rest
+        rest = [i for i in range(len(compatible)) if i not in picks]
+        picks += rng.sample(rest, k=count - len(picks))
+    return picks
+
+
+def recommend(mood, health="None", count=3, seed=None, catalog=None, rotation=None, user=None,
+              scorer=None):
+    """``count`` picks; with ``rotation`` and ``user``, no dish repeats until the pool is used up.
+
+    ``scorer`` must have been built (or updated) for ``catalog``.
+    """
+    catalog = catalog or get_catalog()
+    _check(catalog, mood, health, count)
+    rng = random.Random(seed)
+    dish_ids = catalog.mood_dishes[catalog.mood_id[mood]]
+    modifier_ids = catalog.condition_modifiers[catalog.condition_id[health]]
+    facts = catalog.fun_facts
+    pair = pair_id(catalog, mood, health)
+    nrng = None
+    if scorer is not None:
+        import numpy as np
+
+        nrng = np.random.default_rng(seed)
+        picks = _scored_picks(scorer, mood, health, count, rng, nrng, rotation, user, pair)
+    elif rotation is not None and user is not None:
+        picks = rotation.draw(user, pair, len(dish_ids), count)
+    else:
+        picks = rng.sample(range(len(dish_ids)), k=count)
+    out = []
+    for i in picks:
+        dish = catalog.dishes[dish_ids[i]]
+        if nrng is not None:
+            m = scorer.pick_modifier(mood, health, i, nrng)
+            modifier = catalog.modifiers[modifier_ids[m]] if m is not None else ""
+        else:
+            modifier = catalog.modifiers[rng.choice(modifier_ids)] if len(modifier_ids) else ""
+        fact = rng.choice(facts) if facts else ""
+        out.append(Recommendation(dish, modifier, _label(dish, modifier), fact))
+    return out
+
+
+def recommend_batch(requests, seed=None, catalog=None):
+    """Answer many ``(mood, health, count)`` requests; results keep input order."""
+    import numpy as np
+
+    catalog = catalog or get_catalog()
+    requests = list(requests)
+    rng = np.random.default_rng(seed)
+    groups = defaultdict(list)
+    for n, (mood, health, count) in enumerate(requests):
+        _check(catalog, mood, health, count)
+        groups[mood, health].append(n)
+
+    dishes, modifiers, facts = catalog.dishes, catalog.modifiers, catalog.fun_facts
+    results = [None] * len(requests)
+    for (mood, health), rows in groups.items():
+        dish_ids = np.frombuffer(catalog.mood_dishes[catalog.mood_id[mood]], dtype=np.uint16)
+        modifier_ids = np.frombuffer(
+            catalog.condition_modifiers[catalog.condition_id[health]], dtype=np.uint16
+        )
+        k = max(requests[n][2] for n in rows)
+        # k smallest of uniform random keys per row == sample without replacement
+        keys = rng.random((len(rows), len(dish_ids)))
+        picked = dish_ids[np.argpartition(keys, k - 1, axis=1)[:, :k]].tolist()
+        if len(modifier_ids):
+            mods = modifier_ids[rng.integers(0, len(modifier_ids), size=(len(rows), k))].tolist()
+        else:
+            mods = None
+        fact_ids = rng.integers(0, len(facts), size=(len(rows), k)).tolist() if facts else None
+        for r, n in enumerate(rows):
+            recs = []
+            for j in range(requests[n][2]):
+                dish = dishes[picked[r][j]]
+                modifier = modifiers[mods[r][j]] if mods else ""
+                fact = facts[fact_ids[r][j]] if fact_ids else ""
+                recs.append(Recommendation(dish, modifier, _label(dish, modifier), fact))
+            results[n] = recs
+    return results
@@ -0,0 +1,82 @@
+"""Short "why this dish?" explanations from Gemini, streamed and cached.
+
+``Explainer.stream`` yields text chunks as the model produces them, so the
+page can render token by token (``st.write_stream``) instead of blocking the
+rerun. Finished answers are cached by ``(mood, health, dish)`` in an LRU with
+a TTL; with 9 moods x 8 conditions x ~50 dishes per mood nearly every request
+becomes a hit. Any object with ``stream(prompt)`` can stand in for the model,
+e.g. ``moodfood.stubs.FakeModel`` or ``GeminiClient`` pointed at a
+``GeminiStub``.
+"""
+import json
+
+from .cache import TTLCache
+from .config import get_secret, installed
+
+GEMINI_URL = "https://generativelanguage.googleapis.com"
+GEMINI_MODEL = "gemini-2.5-flash"  # override with `gemini_model` in secrets
+
+
+class GeminiClient:
+    def __init__(self, api_key, model=GEMINI_MODEL, base_url=GEMINI_URL, timeout=20.0):
+        import httpx
+
+        self.api_key = api_key
+        self.model = model
+        self.base_url = base_url.rstrip("/")
+        self._http = httpx.Client(timeout=timeout)
+
+    def stream(self, prompt):
+        url = f"{self.base_url}/v1beta/models/{self.model}:streamGenerateContent"
+        body = {"contents": [{"parts": [{"text": prompt}]}]}
+        params = {"alt": "sse", "key": self.api_key}
+        with self._http.stream("POST", url, params=params, json=body) as response:
+            response.raise_for_status()
+            for line in response.iter_lines():
+                if not line.startswith("data:"):
+                    continue
+                chunk = json.loads(line[5:])
+                for candidate in chunk.get("candidates", []):
+                    for part in candidate.get("content", {}).get("parts", []):
+                        if part.get("text"):
+                            yield part["text"]
+
+
+def build_prompt(mood, health, dish):
+    who = f"someone feeling {mood.lower()}"
+    if health != "None":
+        who += f" and managing {health}"
+    return (f"In two short sentences, explain why {dish} is a good pick for {who}, "
+            f"then give one quick preparation tip. Plain text, no lists.")
+
+
+class Explainer:
+    def __init__(self, model, cache=None):
+        self.model = model
+        self.cache = cache or TTLCache(maxsize=4096, ttl=7 * 24 * 3600.0)
+
+    def stream(self, mood, health, dish):
+        key = (mood, health, dish)
+        cached = self.cache.get(key)
+        if cached is not None:
+            yield cached
+            return
+        parts = []
+        for chunk in self.model.stream(build_prompt(mood, health, dish)):
+            parts.append(chunk)
+            yield chunk
+        # only complete answers are cached; an interrupted stream is retried next time
+        self.cache.set(key, "".join(parts))
+
+    def explain(self, mood, health, dish):
+        return "".join(self.stream(mood, health, dish))
+
+
+def make_explainer(secrets=None, base_url=GEMINI_URL):
+    api_key = (get_secret("api_key", secrets, section="gemini")
+               or get_secret("gemini_api_key", secrets))
+    if not api_key or not installed("httpx"):
+        return None
+    model = (get_secret("model", secrets, section="gemini")
+             or get_secret("gemini_model", secrets, default=GEMINI_MODEL))
+    return Explainer(GeminiClient(api_key, model=model, base_url=base_url))
@@ -0,0 +1,126 @@
+"""Persistent favorites, one list per user/session, in SQLite (WAL mode).
+
+Saves are idempotent: "is this already saved?" is a lookup on the
+``(owner, item)`` primary key plus this process's unwritten saves, and the
+table can't hold a duplicate. Nothing about an owner is cached in memory, so
+several app processes sharing one database file all see each other's saves
+as soon as they are written. New saves are queued and written in one
+transaction, either when ``batch_size`` items are pending or
+``flush_interval`` seconds after the first one, so a burst of clicks costs a
+single commit; until then other processes don't see them (and may report the
+same item as newly saved, though it is stored once). Lists are read back a
+page at a time.
+"""
+import atexit
+import os
+import sqlite3
+import threading
+import time
+
+DEFAULT_PATH = os.environ.get("MOODFOOD_DB", "moodfood.db")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS favorites (
+    owner TEXT NOT NULL,
+    item  TEXT NOT NULL,
+    added REAL NOT NULL,
+    PRIMARY KEY (owner, item)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS favorites_by_owner ON favorites (owner, added);
+"""
+
+
+class FavoritesStore:
+    def __init__(self, path=DEFAULT_PATH, batch_size=64, flush_interval=0.5):
+        self.path = path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.executescript(_SCHEMA)
+        self._lock = threading.RLock()
+        self._pending = []  # (owner, item, added) not yet written
+        self._wake = threading.Event()
+        self._closed = False
+        self._flusher = threading.Thread(target=self._flush_loop, name="favorites-flush", daemon=True)
+        self._flusher.start()
+        atexit.register(self.close)
+
+    # ---- membership ----
+    def _contains_locked(self, owner, item):
+        if any(o == owner and i == item for o, i, _ in self._pending):
+            return True
+        row = self._db.execute("SELECT 1 FROM favorites WHERE owner = ? AND item = ?",
+                               (owner, item)).fetchone()
+        return row is not None
+
+    def contains(self, owner, item):
+        with self._lock:
+            return self._contains_locked(owner, item)
+
+    # ---- writes ----
+    def add(self, owner, item):
+        """Queue ``item`` for ``owner``; returns False if it was already saved."""
+        with self._lock:
+            if self._contains_locked(owner, item):
+                return False
+            self._pending.append((owner, item, time.time()))
+            if len(self._pending) >= self.batch_size:
+                self._flush_locked()
+            else:
+                self._wake.set()
+            return True
+
+    def remove(self, owner, item):
+        with self._lock:
+            self._flush_locked()
+            self._db.execute("DELETE FROM favorites WHERE owner = ? AND item = ?", (owner, item))
+
+    def flush(self):
+        with self._lock:
+            self._flush_locked()
+
+    def _flush_locked(self):
+        if not self._pending:
+            return
+        batch, self._pending = self._pending, []
+        with self._db:
+            self._db.execute("BEGIN")
+            self._db.executemany(
+                "INSERT OR IGNORE INTO favorites (owner, item, added) VALUES (?, ?, ?)", batch
+            )
+
+    def _flush_loop(self):
+        while not self._closed:
+            self._wake.wait()
+            self._wake.clear()
+            time.sleep(self.flush_interval)
+            self.flush()
+
+    # ---- reads ----
+    def count(self, owner):
+        with self._lock:
+            self._flush_locked()
+            (n,) = self._db.execute("SELECT COUNT(*) FROM favorites WHERE owner = ?",
+                                    (owner,)).fetchone()
+            return n
+
+    def page(self, owner, page=0, size=10):
+        """Items saved by ``owner``, oldest first, ``size`` per page."""
+        with self._lock:
+            self._flush_locked()
+            rows = self._db.execute(
+                "SELECT item FROM favorites WHERE owner = ? ORDER BY added LIMIT ? OFFSET ?",
+                (owner, size, page * size),
+            )
+            return [item for (item,) in rows]
+
+    def close(self):
+        with self._lock:
+            if self._closed:
+                return
+            self._flush_locked()
+            self._closed = True
+            self._wake.set()
+            self._db.close()
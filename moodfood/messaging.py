@@ -0,0 +1,254 @@
+"""Send picks by SMS/WhatsApp through Twilio without blocking the script.
+
+``DeliveryQueue.enqueue`` only appends to a queue. A daemon worker drains it
+in batches, sends each batch concurrently over pooled keep-alive connections,
+holds the overall rate under ``rate`` messages/second with a token bucket and
+retries 429/5xx/network failures with exponential backoff. Each number, and
+each sender (the app passes the user id), may only be sent a few messages per
+hour, so the panel can't be used to spam someone. ``stats()`` reports queue
+depth, outcome counters and enqueue-to-delivery latency percentiles.
+Point ``TwilioSender`` at ``moodfood.stubs.TwilioStub`` to load-test offline.
+"""
+import heapq
+import itertools
+import re
+import threading
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+
+from .config import get_secret, installed
+
+TWILIO_URL = "https://api.twilio.com"
+E164 = re.compile(r"^\+[1-9]\d{7,14}$")
+
+
+@dataclass
+class Message:
+    to: str
+    body: str
+    channel: str = "sms"  # or "whatsapp"
+    attempts: int = 0
+    enqueued_at: float = field(default_factory=time.monotonic)
+
+
+class SendError(Exception):
+    def __init__(self, message, retryable):
+        super().__init__(message)
+        self.retryable = retryable
+
+
+class TwilioSender:
+    def __init__(self, sid, token, sms_from, whatsapp_from=None, base_url=TWILIO_URL,
+                 timeout=10.0, pool_size=10):
+        import httpx
+
+        self.sid = sid
+        self.sms_from = sms_from
+        self.whatsapp_from = whatsapp_from
+        self.url = f"{base_url.rstrip('/')}/2010-04-01/Accounts/{sid}/Messages.json"
+        self._http = httpx.Client(
+            auth=(sid, token), timeout=timeout,
+            limits=httpx.Limits(max_connections=pool_size, max_keepalive_connections=pool_size),
+        )
+
+    def send(self, message):
+        if message.channel == "whatsapp":
+            if not self.whatsapp_from:
+                raise SendError("no WhatsApp sender configured", retryable=False)
+            data = {"From": self.whatsapp_from, "To": f"whatsapp:{message.to}"}
+        else:
+            data = {"From": self.sms_from, "To": message.to}
+        data["Body"] = message.body
+        try:
+            response = self._http.post(self.url, data=data)
+        except Exception as exc:
+            raise SendError(str(exc), retryable=True) from exc
+        if response.status_code == 429 or response.status_code >= 500:
+            raise SendError(f"Twilio returned {response.status_code}", retryable=True)
+        if response.status_code >= 400:
+            raise SendError(f"Twilio returned {response.status_code}: {response.text}", retryable=False)
+        try:
+            return response.json().get("sid")
+        except ValueError:
+            # accepted, but the body isn't the JSON we expect; don't resend it
+            return None
+
+
+class TokenBucket:
+    def __init__(self, rate, burst=None, clock=time.monotonic):
+        self.rate = rate
+        self.capacity = burst or max(1.0, rate)
+        self.tokens = self.capacity
+        self.clock = clock
+        self.updated = clock()
+
+    def take(self):
+        """Seconds to wait before one token is available (0 if taken now)."""
+        now = self.clock()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+
+class SendLimit:
+    """At most ``limit`` messages per key in any ``window`` seconds; callers hold the lock."""
+
+    def __init__(self, limit, window=3600.0, maxkeys=100000, clock=time.monotonic):
+        self.limit = limit
+        self.window = window
+        self.maxkeys = maxkeys
+        self.clock = clock
+        self._sent = OrderedDict()  # key -> deque of send times
+
+    def wait(self, key):
+        """Seconds until ``key`` may send again (0 if it may now)."""
+        times = self._sent.get(key)
+        if not times:
+            return 0.0
+        now = self.clock()
+        while times and times[0] <= now - self.window:
+            times.popleft()
+        return 0.0 if len(times) < self.limit else times[0] + self.window - now
+
+    def record(self, key):
+        times = self._sent.get(key)
+        if times is None:
+            times = self._sent[key] = deque()
+            while len(self._sent) > self.maxkeys:
+                self._sent.popitem(last=False)
+        else:
+            self._sent.move_to_end(key)
+        times.append(self.clock())
+
+
+class DeliveryQueue:
+    def __init__(self, sender, rate=10.0, batch_size=10, max_attempts=5, backoff=0.5,
+                 max_backoff=30.0, maxsize=10000, per_number=3, per_sender=5, limit_window=3600.0):
+        self.sender = sender
+        self.batch_size = batch_size
+        self.max_attempts = max_attempts
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.maxsize = maxsize
+        self._bucket = TokenBucket(rate)
+        self._heap = []  # (ready_at, seq, message)
+        self._seq = itertools.count()
+        self._cond = threading.Condition()
+        self._pool = ThreadPoolExecutor(max_workers=batch_size, thread_name_prefix="twilio-send")
+        self._latency = deque(maxlen=1000)
+        self._per_number = SendLimit(per_number, limit_window)
+        self._per_sender = SendLimit(per_sender, limit_window)
+        self.counts = {"enqueued": 0, "sent": 0, "retried": 0, "failed": 0, "dropped": 0,
+                       "limited": 0}
+        self._stopped = False
+        self._worker = threading.Thread(target=self._run, name="twilio-queue", daemon=True)
+        self._worker.start()
+
+    def limited(self, to, sender=None):
+        """Seconds until ``to`` (and ``sender``) may be sent another message; 0 if now."""
+        with self._cond:
+            return self._limited(to, sender)
+
+    def _limited(self, to, sender):
+        wait = self._per_number.wait(to)
+        if sender is not None:
+            wait = max(wait, self._per_sender.wait(sender))
+        return wait
+
+    def enqueue(self, to, body, channel="sms", sender=None):
+        """Queue a message; returns False if the queue is full or a send limit is reached."""
+        with self._cond:
+            if len(self._heap) >= self.maxsize:
+                self.counts["dropped"] += 1
+                return False
+            if self._limited(to, sender):
+                self.counts["limited"] += 1
+                return False
+            self._per_number.record(to)
+            if sender is not None:
+                self._per_sender.record(sender)
+            self._push(Message(to, body, channel), time.monotonic())
+            self.counts["enqueued"] += 1
+            self._cond.notify()
+            return True
+
+    def _push(self, message, ready_at):
+        heapq.heappush(self._heap, (ready_at, next(self._seq), message))
+
+    def _next_batch(self):
+        with self._cond:
+            while not self._stopped:
+                now = time.monotonic()
+                if self._heap and self._heap[0][0] <= now:
+                    batch = []
+                    while self._heap and self._heap[0][0] <= now and len(batch) < self.batch_size:
+                        batch.append(heapq.heappop(self._heap)[2])
+                    return batch
+                self._cond.wait(self._heap[0][0] - now if self._heap else None)
+            return []
+
+    def _run(self):
+        while not self._stopped:
+            batch = self._next_batch()
+            futures = []
+            for message in batch:
+                wait = self._bucket.take()
+                while wait:
+                    time.sleep(wait)
+                    wait = self._bucket.take()
+                futures.append((message, self._pool.submit(self.sender.send, message)))
+            for message, future in futures:
+                self._settle(message, future)
+
+    def _settle(self, message, future):
+        message.attempts += 1
+        try:
+            future.result()
+        except Exception as exc:
+            # anything but a retryable SendError (a bug, a malformed reply) fails the
+            # message; the worker itself must keep running
+            retryable = isinstance(exc, SendError) and exc.retryable
+            with self._cond:
+                if retryable and message.attempts < self.max_attempts:
+                    delay = min(self.max_backoff, self.backoff * 2 ** (message.attempts - 1))
+                    self._push(message, time.monotonic() + delay)
+                    self.counts["retried"] += 1
+                else:
+                    self.counts["failed"] += 1
+            return
+        with self._cond:
+            self.counts["sent"] += 1
+            self._latency.append(time.monotonic() - message.enqueued_at)
+
+    def stats(self):
+        with self._cond:
+            latency = sorted(self._latency)
+            depth = len(self._heap)
+            counts = dict(self.counts)
+        pct = lambda q: latency[min(len(latency) - 1, int(q * len(latency)))] if latency else None  # noqa: E731
+        return {"depth": depth, **counts, "p50_s": pct(0.5), "p95_s": pct(0.95), "p99_s": pct(0.99)}
+
+    def stop(self):
+        with self._cond:
+            self._stopped = True
+            self._cond.notify_all()
+        self._worker.join()
+        self._pool.shutdown(wait=True)
+
+
+def make_queue(secrets=None, base_url=TWILIO_URL):
+    sid = get_secret("twilio_sid", secrets)
+    token = get_secret("twilio_auth_token", secrets)
+    sms_from = get_secret("twilio_sms_from", secrets)
+    if not (sid and token and sms_from) or "X" in sms_from:  # "+1XXXXXXXXXX" template
+        return None
+    if not installed("httpx"):
+        return None
+    sender = TwilioSender(sid, token, sms_from, get_secret("twilio_whatsapp_from", secrets),
+                          base_url=base_url)
+    return DeliveryQueue(sender)
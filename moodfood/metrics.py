@@ -0,0 +1,274 @@
+"""Per-rerun instrumentation: phase timings, counters and a Prometheus endpoint.
+
+``Metrics`` keeps counters and fixed-bucket histograms keyed by name and
+labels, plus cache sources polled at scrape time, and renders them in the
+Prometheus text format. ``phase`` times a block of the script into
+``moodfood_phase_seconds{phase=...}``. ``MetricsServer`` serves
+``/metrics`` from a daemon thread on ``127.0.0.1``.
+
+``RerunProfiler`` is the opt-in deep view: cProfile on the script thread plus
+tracemalloc, dumped to a ``.prof`` file and a short text report. Only one
+rerun in the process is profiled at a time; a rerun that never reached
+``stop`` (Streamlit interrupts a script when the user clicks mid-run) is
+abandoned after ``max_age`` seconds. tracemalloc sees every thread, so the
+allocation numbers include whatever other sessions did meanwhile. Profiling
+slows the whole process down and the report shows server paths, so
+``make_profiler`` only enables it with a ``profile_token`` secret, and only
+the newest ``max_files`` dumps are kept on disk.
+"""
+import hmac
+import io
+import os
+import tempfile
+import threading
+import time
+import tracemalloc
+from bisect import bisect_left
+from contextlib import contextmanager
+
+from .config import get_secret
+
+# seconds; a rerun phase is usually well under 100 ms
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+
+HELP = {
+    "moodfood_phase_seconds": "Time spent in each phase of a script rerun.",
+    "moodfood_runs_total": "Script runs: scope=page per full rerun, one per panel run.",
+    "moodfood_clicks_total": "Button clicks, by button.",
+    "moodfood_cache_hits_total": "Cache hits, by cache.",
+    "moodfood_cache_misses_total": "Cache misses, by cache.",
+}
+
+
+def _labels(labels):
+    if not labels:
+        return ""
+    body = ",".join(
+        '{}="{}"'.format(k, str(v).replace("\\", r"\\").replace('"', r"\"").replace("\n", r"\n"))
+        for k, v in labels
+    )
+    return "{" + body + "}"
+
+
+class _Histogram:
+    __slots__ = ("counts", "sum")
+
+    def __init__(self, size):
+        self.counts = [0] * (size + 1)  # last slot is +Inf
+        self.sum = 0.0
+
+
+class Metrics:
+    def __init__(self, buckets=DEFAULT_BUCKETS, clock=time.perf_counter):
+        self.buckets = tuple(buckets)
+        self.clock = clock
+        self._counters = {}    # (name, labels) -> value
+        self._histograms = {}  # (name, labels) -> _Histogram
+        self._caches = {}      # cache name -> callable returning (hits, misses)
+        self._lock = threading.Lock()
+
+    def inc(self, name, amount=1, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + amount
+
+    def observe(self, name, value, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        i = bisect_left(self.buckets, value)
+        with self._lock:
+            hist = self._histograms.get(key)
+            if hist is None:
+                hist = self._histograms[key] = _Histogram(len(self.buckets))
+            hist.counts[i] += 1
+            hist.sum += value
+
+    @contextmanager
+    def phase(self, name):
+        t0 = self.clock()
+        try:
+            yield
+        finally:
+            self.observe("moodfood_phase_seconds", self.clock() - t0, phase=name)
+
+    def track_cache(self, name, source):
+        """``source()`` returns ``(hits, misses)``; it is read on every scrape."""
+        with self._lock:
+            self._caches[name] = source
+
+    def snapshot(self):
+        """Counters and ``(bucket counts, sum)`` per histogram, for tests and benchmarks."""
+        with self._lock:
+            counters = dict(self._counters)
+            hists = {k: (list(h.counts), h.sum) for k, h in self._histograms.items()}
+            caches = dict(self._caches)
+        for cache, source in caches.items():
+            try:
+                hits, misses = source()
+            except Exception:
+                continue  # a cache that went away must not break the scrape
+            counters["moodfood_cache_hits_total", (("cache", cache),)] = hits
+            counters["moodfood_cache_misses_total", (("cache", cache),)] = misses
+        return counters, hists
+
+    def render(self):
+        counters, hists = self.snapshot()
+        out = []
+        for name in sorted({k[0] for k in counters}):
+            out.append(f"# HELP {name} {HELP.get(name, name)}")
+            out.append(f"# TYPE {name} counter")
+            for (n, labels), value in sorted(counters.items()):
+                if n == name:
+                    out.append(f"{name}{_labels(labels)} {value}")
+        for name in sorted({k[0] for k in hists}):
+            out.append(f"# HELP {name} {HELP.get(name, name)}")
+            out.append(f"# TYPE {name} histogram")
+            for (n, labels), (counts, total) in sorted(hists.items()):
+                if n != name:
+                    continue
+                running = 0
+                for bound, count in zip(self.buckets + (float("inf"),), counts):
+                    running += count
+                    le = "+Inf" if bound == float("inf") else repr(bound)
+                    out.append(f"{name}_bucket{_labels(labels + (('le', le),))} {running}")
+                out.append(f"{name}_sum{_labels(labels)} {total}")
+                out.append(f"{name}_count{_labels(labels)} {running}")
+        return "\n".join(out) + "\n"
+
+
+class MetricsServer:
+    """``GET /metrics`` on ``host:port`` (port 0 picks a free one)."""
+
+    def __init__(self, metrics, host="127.0.0.1", port=9464):
+        # imported here so that importing this module stays cheap
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+        self.metrics = metrics
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split("?")[0] != "/metrics":
+                    self.send_error(404)
+                    return
+                data = server.metrics.render().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, *args):
+                pass
+
+        self._server = ThreadingHTTPServer((host, port), Handler)
+        self._server.daemon_threads = True
+        self.url = f"http://{host}:{self._server.server_address[1]}/metrics"
+        self._thread = threading.Thread(target=self._server.serve_forever,
+                                        name="moodfood-metrics", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+
+class RerunProfiler:
+    """Profile one rerun at a time; ``start`` returns False if another one is running."""
+
+    def __init__(self, token, out_dir=None, top=25, max_age=30.0, max_files=20,
+                 clock=time.monotonic):
+        self.token = token
+        self.out_dir = out_dir or os.environ.get(
+            "MOODFOOD_PROFILE_DIR", os.path.join(tempfile.gettempdir(), "moodfood-profiles")
+        )
+        self.top = top
+        self.max_age = max_age
+        self.max_files = max_files
+        self.clock = clock
+        self._lock = threading.Lock()
+        self._profile = None
+        self._started = 0.0
+        self._owns_trace = False
+
+    def allows(self, token):
+        """True if ``token`` (e.g. the ``?profile=`` value) is the configured one."""
+        return bool(token) and hmac.compare_digest(str(token).encode(), self.token.encode())
+
+    def start(self):
+        with self._lock:
+            if self._profile is not None:
+                if self.clock() - self._started < self.max_age:
+                    return False
+                self._finish()
+            import cProfile
+
+            profile = cProfile.Profile()
+            try:
+                profile.enable()
+            except ValueError:
+                return False  # another profiler owns the interpreter
+            # leave tracemalloc alone if someone else (e.g. a benchmark) started it
+            self._owns_trace = not tracemalloc.is_tracing()
+            if self._owns_trace:
+                tracemalloc.start()
+            self._profile, self._started = profile, self.clock()
+            return True
+
+    def _finish(self):
+        self._profile.disable()
+        if self._owns_trace:
+            tracemalloc.stop()
+        self._profile = None
+
+    def stop(self, tag="rerun"):
+        """Dump the run; returns ``(path to the .prof file, text report)``, or None."""
+        with self._lock:
+            profile = self._profile
+            if profile is None:
+                return None
+            profile.disable()
+            current, peak = tracemalloc.get_traced_memory()
+            allocations = tracemalloc.take_snapshot().statistics("lineno")[:10]
+            self._finish()
+        os.makedirs(self.out_dir, exist_ok=True)
+        path = os.path.join(self.out_dir, f"{tag}-{time.strftime('%Y%m%d-%H%M%S')}.prof")
+        profile.dump_stats(path)
+        self._prune()
+        report = io.StringIO()
+        import pstats
+
+        pstats.Stats(profile, stream=report).sort_stats("cumulative").print_stats(self.top)
+        report.write(f"traced memory: {current / 1024:.1f} KiB now, {peak / 1024:.1f} KiB peak\n")
+        for stat in allocations:
+            report.write(f"{stat}\n")
+        return path, report.getvalue()
+
+    def _prune(self):
+        """Delete all but the newest ``max_files`` dumps."""
+        try:
+            with os.scandir(self.out_dir) as entries:
+                dumps = [e for e in entries if e.name.endswith(".prof") and e.is_file()]
+            dumps.sort(key=lambda e: e.stat().st_mtime, reverse=True)
+            for entry in dumps[self.max_files:]:
+                os.remove(entry.path)
+        except OSError:
+            pass  # another process pruned it first
+
+
+def make_profiler(secrets=None):
+    """``RerunProfiler`` gated on the ``profile_token`` secret; ``None`` without one."""
+    token = get_secret("profile_token", secrets)
+    if not token:
+        return None
+    return RerunProfiler(str(token))
+
+
+def make_server(metrics, secrets=None):
+    """Start the endpoint on ``metrics_port`` (default 9464); ``None`` if disabled or taken."""
+    port = str(get_secret("metrics_port", secrets, default="9464"))
+    if port in ("0", "off", "false"):
+        return None
+    try:
+        return MetricsServer(metrics, port=int(port))
+    except OSError:
+        return None  # e.g. another app process already serves it
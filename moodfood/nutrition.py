@@ -0,0 +1,165 @@
+"""Nutrition enrichment for recommended dishes (Edamam or USDA FoodData Central).
+
+``NutritionClient.enrich`` answers from a tiered cache (in-process LRU+TTL in
+front of an SQLite file) and fetches every miss concurrently over one pooled
+``httpx.AsyncClient`` running on a background loop. Identical lookups already
+in flight share a single request. The caller waits at most ``timeout``
+seconds -- one round-trip -- and anything slower simply shows up on a later
+rerun once it has landed in the cache.
+
+``httpx`` is optional; ``make_client`` returns ``None`` when it or the API keys
+are missing and the cards render without nutrition.
+"""
+import asyncio
+import concurrent.futures
+import os
+from typing import NamedTuple
+
+from .aio import BackgroundLoop
+from .cache import DiskCache, TieredCache, TTLCache
+from .config import get_secret, installed
+
+CACHE_PATH = os.environ.get("MOODFOOD_CACHE_DB", "moodfood_cache.db")
+_MISSING = object()
+
+
+class Nutrition(NamedTuple):
+    calories: float
+    protein_g: float
+    carbs_g: float
+    fat_g: float
+    sodium_mg: float
+
+    def summary(self):
+        return (f"🔥 {self.calories:.0f} kcal · P {self.protein_g:.0f}g · C {self.carbs_g:.0f}g"
+                f" · F {self.fat_g:.0f}g · Na {self.sodium_mg:.0f}mg")
+
+
+class EdamamProvider:
+    name = "edamam"
+
+    def __init__(self, app_id, app_key, base_url="https://api.edamam.com"):
+        self.app_id, self.app_key, self.base_url = app_id, app_key, base_url.rstrip("/")
+
+    def request(self, dish):
+        return f"{self.base_url}/api/nutrition-data", {
+            "app_id": self.app_id, "app_key": self.app_key, "ingr": f"1 serving {dish}",
+        }
+
+    def parse(self, data):
+        if not data.get("calories"):
+            return None
+        n = data.get("totalNutrients", {})
+        qty = lambda code: n.get(code, {}).get("quantity", 0.0)  # noqa: E731
+        return Nutrition(data["calories"], qty("PROCNT"), qty("CHOCDF"), qty("FAT"), qty("NA"))
+
+
+class UsdaProvider:
+    name = "usda"
+    # FoodData Central nutrient numbers
+    _FIELDS = {"208": "calories", "203": "protein_g", "205": "carbs_g", "204": "fat_g",
+               "307": "sodium_mg"}
+
+    def __init__(self, api_key, base_url="https://api.nal.usda.gov"):
+        self.api_key, self.base_url = api_key, base_url.rstrip("/")
+
+    def request(self, dish):
+        return f"{self.base_url}/fdc/v1/foods/search", {
+            "api_key": self.api_key, "query": dish, "pageSize": 1,
+        }
+
+    def parse(self, data):
+        foods = data.get("foods") or []
+        if not foods:
+            return None
+        values = dict.fromkeys(self._FIELDS.values(), 0.0)
+        for nutrient in foods[0].get("foodNutrients", []):
+            field = self._FIELDS.get(str(nutrient.get("nutrientNumber")))
+            if field:
+                values[field] = float(nutrient.get("value") or 0.0)
+        return Nutrition(**values)
+
+
+class NutritionClient:
+    def __init__(self, provider, cache=None, timeout=1.5, max_connections=20, loop=None):
+        self.provider = provider
+        self.cache = cache or TieredCache(TTLCache(maxsize=4096, ttl=24 * 3600.0))
+        self.timeout = timeout
+        self.max_connections = max_connections
+        self._loop = loop or BackgroundLoop("nutrition")
+        self._http = None
+        self._inflight = {}  # key -> asyncio.Future, only touched on the loop thread
+
+    def _key(self, dish):
+        return f"{self.provider.name}:{dish.lower()}"
+
+    def _client(self):
+        if self._http is None:
+            import httpx
+
+            self._http = httpx.AsyncClient(
+                timeout=self.timeout,
+                limits=httpx.Limits(max_connections=self.max_connections,
+                                    max_keepalive_connections=self.max_connections),
+            )
+        return self._http
+
+    async def _fetch(self, dish):
+        url, params = self.provider.request(dish)
+        try:
+            response = await self._client().get(url, params=params)
+            response.raise_for_status()
+            result = self.provider.parse(response.json())
+        except Exception:
+            # network/API trouble: leave it uncached so the next rerun retries
+            return None
+        self.cache.set(self._key(dish), result._asdict() if result else None)
+        return result
+
+    async def lookup(self, dish):
+        key = self._key(dish)
+        cached = self.cache.get(key, _MISSING)
+        if cached is not _MISSING:
+            return Nutrition(**cached) if cached else None
+        future = self._inflight.get(key)
+        if future is None:
+            future = self._inflight[key] = asyncio.ensure_future(self._fetch(dish))
+            future.add_done_callback(lambda _: self._inflight.pop(key, None))
+        return await future
+
+    async def lookup_many(self, dishes):
+        results = await asyncio.gather(*(self.lookup(d) for d in dishes))
+        return dict(zip(dishes, results))
+
+    def enrich(self, dishes, timeout=None):
+        """dish -> ``Nutrition`` (or ``None``) for whatever is ready within ``timeout``."""
+        out, missing = {}, []
+        for dish in dishes:
+            cached = self.cache.get(self._key(dish), _MISSING)
+            if cached is _MISSING:
+                missing.append(dish)
+            else:
+                out[dish] = Nutrition(**cached) if cached else None
+        if missing:
+            future = self._loop.submit(self.lookup_many(missing))
+            try:
+                out.update(future.result(self.timeout if timeout is None else timeout))
+            except concurrent.futures.TimeoutError:
+                pass  # keeps running; the results land in the cache
+        return out
+
+
+def make_client(secrets=None, base_url=None, cache_path=CACHE_PATH):
+    """Client for whichever provider has keys configured (Edamam first)."""
+    if not installed("httpx"):
+        return None
+    app_id, app_key = get_secret("edamam_app_id", secrets), get_secret("edamam_app_key", secrets)
+    usda_key = get_secret("usda_api_key", secrets)
+    if app_id and app_key:
+        provider = EdamamProvider(app_id, app_key, *([base_url] if base_url else []))
+    elif usda_key:
+        provider = UsdaProvider(usda_key, *([base_url] if base_url else []))
+    else:
+        return None
+    disk = DiskCache(cache_path, table="nutrition") if cache_path else None
+    return NutritionClient(provider, TieredCache(TTLCache(maxsize=4096, ttl=24 * 3600.0), disk))
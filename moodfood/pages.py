@@ -0,0 +1,228 @@
+"""Static landing pages for every mood x health pair, for crawlers and anonymous visitors.
+
+    python -m moodfood.pages [--out site] [--base-url https://yourdomain.com] [--force]
+
+Writes ``<mood>/<condition>.html`` and ``.json`` for each pair, an index
+page, ``sitemap.xml`` and ``robots.txt``, plus the hashed stylesheet, so a web
+server or CDN can answer bot and first-visit traffic without starting a
+Streamlit session. Every page carries its own title, description, canonical
+URL, Open Graph tags and JSON-LD (breadcrumbs, an ``ItemList`` of the picks
+and a one-question ``FAQPage``), and links into the app with the pair
+preselected.
+
+A page's content is the mood's compatible dishes, best first, each with its
+best modifier from ``moodfood.scoring``. Its digest is stored in
+``pages.json``; a rerun rewrites only pages whose digest changed, and the
+sitemap's ``lastmod`` is the date a page last changed.
+"""
+import argparse
+import hashlib
+import json
+import re
+import time
+import zlib
+from html import escape
+from pathlib import Path
+from urllib.parse import urlencode
+
+from .assets import compile_sources, hashed_name
+from .catalog import get_catalog
+from .config import get_secret
+from .engine import _label
+
+SITE_DIR = Path(__file__).resolve().parent.parent / "site"
+MANIFEST = "pages.json"
+
+_PAGE = """<!DOCTYPE html>
+<html lang="en"><head><meta charset="utf-8"/>
+<meta name="viewport" content="width=device-width,initial-scale=1"/>
+<title>{title}</title>
+<meta name="description" content="{description}"/>
+<meta name="robots" content="index, follow"/>
+<link rel="canonical" href="{url}"/>
+<meta property="og:title" content="{title}"/>
+<meta property="og:description" content="{description}"/>
+<meta property="og:type" content="article"/>
+<meta property="og:url" content="{url}"/>
+<meta property="og:image" content="{base}/thumbnail.png"/>
+<meta name="twitter:card" content="summary_large_image"/>
+<link rel="stylesheet" href="{css}"/>
+{json_ld}
+</head><body><main class="panel">
+<p class="small"><a href="{home}">MoodFood</a> › {crumb}</p>
+<h1>{heading}</h1>
+<p class="small">{intro}</p>
+{body}
+<p><a class="badge" href="{app}">🍽️ Get personal picks in the app</a></p>
+</main></body></html>
+"""
+
+
+def slug(name):
+    return re.sub(r"[^a-z0-9]+", "-", name.lower()).strip("-")
+
+
+def _json_ld(*docs):
+    return "".join(
+        '<script type="application/ld+json">'
+        + json.dumps(doc, ensure_ascii=False, separators=(",", ":"))
+        + "</script>"
+        for doc in docs
+    )
+
+
+def page_data(catalog, scorer, mood, health, limit=20):
+    """What a page shows; its digest decides whether the page is rewritten."""
+    modifier_ids = catalog.condition_modifiers[catalog.condition_id[health]]
+    dish_ids = catalog.mood_dishes[catalog.mood_id[mood]]
+    picks = []
+    for position in scorer.top_k(mood, health, limit):
+        dish = catalog.dishes[dish_ids[position]]
+        m = scorer.best_modifier(mood, health, position)
+        modifier = catalog.modifiers[modifier_ids[m]] if m is not None else ""
+        picks.append({"dish": dish, "modifier": modifier, "label": _label(dish, modifier)})
+    facts = catalog.fun_facts
+    fact = facts[zlib.crc32(f"{mood}:{health}".encode()) % len(facts)] if facts else ""
+    return {"mood": mood, "health": health, "picks": picks, "fact": fact}
+
+
+def render_page(data, base_url, css):
+    mood, health = data["mood"], data["health"]
+    url = f"{base_url}/{slug(mood)}/{slug(health)}.html"
+    if health == "None":
+        heading = f"What to eat when you feel {mood.lower()}"
+        crumb = mood
+    else:
+        heading = f"What to eat when you feel {mood.lower()} and manage {health}"
+        crumb = f"{mood} › {health}"
+    names = [p["label"] for p in data["picks"]]
+    description = f"{heading}: {', '.join(names[:5])} and {max(0, len(names) - 5)} more ideas."
+    title = f"{heading} | MoodFood"
+    json_ld = _json_ld(
+        {"@context": "https://schema.org", "@type": "BreadcrumbList", "itemListElement": [
+            {"@type": "ListItem", "position": 1, "name": "MoodFood", "item": f"{base_url}/"},
+            {"@type": "ListItem", "position": 2, "name": crumb, "item": url},
+        ]},
+        {"@context": "https://schema.org", "@type": "ItemList", "name": heading,
+         "itemListElement": [{"@type": "ListItem", "position": n, "name": name}
+                             for n, name in enumerate(names, 1)]},
+        {"@context": "https://schema.org", "@type": "FAQPage", "mainEntity": [
+            {"@type": "Question", "name": f"{heading}?",
+             "acceptedAnswer": {"@type": "Answer", "text": f"Try {', '.join(names[:3])}."}},
+        ]},
+    )
+    cards = "".join(
+        f"<div class='rec-card'>✅ <b>{escape(p['label'])}</b>"
+        f"<span class='badge'>{escape(mood)}</span>"
+        f"<span class='badge'>{escape(health)}</span></div>"
+        for p in data["picks"]
+    )
+    if data["fact"]:
+        cards += f"<p class='small'>{escape(data['fact'])}</p>"
+    return _PAGE.format(
+        title=escape(title), description=escape(description), url=url, base=base_url,
+        css=f"../{css}", json_ld=json_ld, home="../index.html", crumb=escape(crumb),
+        heading=escape(heading), intro=escape(f"{len(names)} ideas picked for this combination."),
+        body=cards, app=escape(f"{base_url}/?{urlencode({'mood': mood, 'health': health})}"),
+    )
+
+
+def render_index(catalog, base_url, css):
+    rows = "".join(
+        f"<h2>{escape(mood)}</h2><p>"
+        + " ".join(f"<a class='badge' href='{slug(mood)}/{slug(health)}.html'>{escape(health)}</a>"
+                   for health in catalog.conditions)
+        + "</p>"
+        for mood in catalog.moods
+    )
+    return _PAGE.format(
+        title="MoodFood - food ideas for every mood and health condition",
+        description="Food ideas for every mood and health condition.", url=f"{base_url}/",
+        base=base_url, css=css, json_ld="", home="index.html", crumb="All pages",
+        heading="Food ideas for every mood", intro="Pick your mood and health condition.",
+        body=rows, app=f"{base_url}/",
+    )
+
+
+def render_sitemap(base_url, pages):
+    urls = "".join(
+        f"<url><loc>{escape(base_url)}/{escape(path)}</loc><lastmod>{entry['lastmod']}</lastmod></url>"
+        for path, entry in sorted(pages.items())
+    )
+    return ('<?xml version="1.0" encoding="UTF-8"?>\n'
+            f'<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">{urls}</urlset>\n')
+
+
+def _digest(*parts):
+    return hashlib.sha256(json.dumps(parts, sort_keys=True).encode("utf-8")).hexdigest()[:16]
+
+
+def _write(path, text):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(text, encoding="utf-8")
+
+
+def generate(out_dir=SITE_DIR, base_url="https://yourdomain.com", catalog=None, force=False):
+    """Write the site; returns the paths that were (re)written."""
+    from .scoring import Scorer
+
+    out_dir = Path(out_dir)
+    base_url = base_url.rstrip("/")
+    catalog = catalog or get_catalog()
+    scorer = Scorer(catalog)
+    css_content = compile_sources()["app.css"]
+    css = hashed_name("app.css", css_content)
+    manifest_path = out_dir / MANIFEST
+    old = {} if force or not manifest_path.exists() else json.loads(manifest_path.read_text())
+    today = time.strftime("%Y-%m-%d")
+    pages, written = {}, []
+
+    def emit(path, text, digest):
+        entry = old.get(path)
+        if entry and entry["digest"] == digest and (out_dir / path).exists():
+            pages[path] = entry
+            return
+        _write(out_dir / path, text)
+        pages[path] = {"digest": digest, "lastmod": today}
+        written.append(path)
+
+    if not (out_dir / css).exists():
+        for stale in out_dir.glob("app.*.css"):
+            stale.unlink()
+        _write(out_dir / css, css_content)
+        written.append(css)
+    emit("index.html", render_index(catalog, base_url, css),
+         _digest(catalog.moods, catalog.conditions, base_url, css))
+    for mood in catalog.moods:
+        for health in catalog.conditions:
+            data = page_data(catalog, scorer, mood, health)
+            digest = _digest(data, base_url, css)
+            path = f"{slug(mood)}/{slug(health)}"
+            emit(f"{path}.json", json.dumps(data, ensure_ascii=False, indent=1) + "\n", digest)
+            emit(f"{path}.html", render_page(data, base_url, css), digest)
+
+    # pages of moods/conditions that left the catalog
+    for path in old.keys() - pages.keys():
+        (out_dir / path).unlink(missing_ok=True)
+    html_pages = {p: e for p, e in pages.items() if p.endswith(".html")}
+    if written or old.keys() != pages.keys():
+        _write(out_dir / "sitemap.xml", render_sitemap(base_url, html_pages))
+        _write(out_dir / "robots.txt", f"User-agent: *\nAllow: /\nSitemap: {base_url}/sitemap.xml\n")
+        _write(manifest_path, json.dumps(pages, indent=1, sort_keys=True) + "\n")
+    return written
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Pre-render the static mood x health pages.")
+    parser.add_argument("--out", default=str(SITE_DIR), help="output directory")
+    parser.add_argument("--base-url", default=get_secret("site_url", default="https://yourdomain.com"))
+    parser.add_argument("--force", action="store_true", help="rewrite every page")
+    args = parser.parse_args(argv)
+    written = generate(args.out, args.base_url, force=args.force)
+    print(f"{len(written)} file(s) written to {args.out}")
+    for path in written:
+        print(f"  {path}")
+
+
+if __name__ == "__main__":
+    main()
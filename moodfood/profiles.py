@@ -0,0 +1,65 @@
+"""Per-user profiles (signed-in users): name, email and default mood/health.
+
+Stored next to the favorites in the same SQLite file. A profile is read once
+per session and written only when the user changes their defaults.
+"""
+import sqlite3
+import threading
+import time
+from typing import NamedTuple, Optional
+
+from .favorites import DEFAULT_PATH
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS profiles (
+    user_id        TEXT PRIMARY KEY,
+    email          TEXT,
+    name           TEXT,
+    default_mood   TEXT,
+    default_health TEXT,
+    updated        REAL NOT NULL
+)
+"""
+
+
+class Profile(NamedTuple):
+    user_id: str
+    email: Optional[str] = None
+    name: Optional[str] = None
+    default_mood: Optional[str] = None
+    default_health: Optional[str] = None
+
+
+class ProfileStore:
+    def __init__(self, path=DEFAULT_PATH):
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(_SCHEMA)
+        self._lock = threading.Lock()
+
+    def get(self, user_id):
+        with self._lock:
+            row = self._db.execute(
+                "SELECT user_id, email, name, default_mood, default_health "
+                "FROM profiles WHERE user_id = ?", (user_id,)
+            ).fetchone()
+        return Profile(*row) if row else None
+
+    def sign_in(self, user_id, email=None, name=None):
+        """Create or refresh the profile from ID-token claims; returns it."""
+        with self._lock:
+            self._db.execute(
+                "INSERT INTO profiles (user_id, email, name, updated) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT(user_id) DO UPDATE SET email = excluded.email, "
+                "name = excluded.name, updated = excluded.updated",
+                (user_id, email, name, time.time()),
+            )
+        return self.get(user_id)
+
+    def set_defaults(self, user_id, mood, health):
+        with self._lock:
+            self._db.execute(
+                "UPDATE profiles SET default_mood = ?, default_health = ?, updated = ? "
+                "WHERE user_id = ?", (mood, health, time.time(), user_id),
+            )
+        return self.get(user_id)
@@ -0,0 +1,106 @@
+"""No-repeat dish rotation ("shuffle bag") per user and (mood, health) pair.
+
+Rather than storing a shuffled list, each pair keeps a 32-bit permutation key,
+a cursor and the pool size packed into one 64-bit integer. The n-th dish of
+the current round is ``permute(n, size, key)``, a keyed Feistel network over
+the index range (cycle-walking into ``[0, size)``), so every dish comes up
+exactly once per round. A draw costs O(count), and a user who has touched a
+few pairs costs a few dozen bytes. When a round is used up the key is
+re-mixed and a new round starts. If the catalog changes a pool's size, that
+pair starts over.
+"""
+import threading
+import zlib
+from collections import OrderedDict
+
+_M32 = 0xFFFFFFFF
+
+
+def _mix(x):
+    # 32-bit integer hash (lowbias32)
+    x ^= x >> 16
+    x = (x * 0x7FEB352D) & _M32
+    x ^= x >> 15
+    x = (x * 0x846CA68B) & _M32
+    x ^= x >> 16
+    return x
+
+
+def permute(i, size, key):
+    """Position ``i`` of a pseudo-random permutation of ``range(size)``."""
+    bits = max(2, (size - 1).bit_length())
+    bits += bits & 1
+    half = bits // 2
+    mask = (1 << half) - 1
+    x = i
+    while True:
+        left, right = x >> half, x & mask
+        for rnd in range(4):
+            left, right = right, left ^ (_mix(right ^ key ^ (rnd << 24)) & mask)
+        x = (left << half) | right
+        if x < size:
+            return x
+
+
+def _pack(key, cursor, size):
+    return (key << 32) | (cursor << 16) | size
+
+
+def _unpack(state):
+    return state >> 32, (state >> 16) & 0xFFFF, state & 0xFFFF
+
+
+class Rotation:
+    def __init__(self, max_users=100000):
+        self.max_users = max_users
+        self._users = OrderedDict()  # user -> {pair: packed state}
+        self._lock = threading.Lock()
+
+    def _state(self, user, pair, size):
+        states = self._users.get(user)
+        if states is None:
+            states = self._users[user] = {}
+            if len(self._users) > self.max_users:
+                self._users.popitem(last=False)
+        else:
+            self._users.move_to_end(user)
+        state = states.get(pair)
+        if state is None or state & 0xFFFF != size:
+            state = _pack(_mix(zlib.crc32(f"{user}:{pair}".encode())), 0, size)
+        return states, state
+
+    def draw(self, user, pair, size, count):
+        """``count`` distinct indices into a pool of ``size``, none repeated this round."""
+        count = min(count, size)
+        with self._lock:
+            states, state = self._state(user, pair, size)
+            key, cursor, _ = _unpack(state)
+            out = []
+            while len(out) < count:
+                if cursor == size:
+                    # round used up: new permutation
+                    key, cursor = _mix(key ^ 0x9E3779B9), 0
+                i = permute(cursor, size, key)
+                cursor += 1
+                if i not in out:
+                    out.append(i)
+            states[pair] = _pack(key, cursor, size)
+        return out
+
+    def seen(self, user, pair):
+        """How many dishes of the current round ``user`` has been shown for ``pair``."""
+        with self._lock:
+            state = self._users.get(user, {}).get(pair)
+        return 0 if state is None else _unpack(state)[1]
+
+    def export(self, user):
+        """The user's packed states, e.g. to persist them."""
+        with self._lock:
+            return dict(self._users.get(user, {}))
+
+    def restore(self, user, states):
+        with self._lock:
+            self._users[user] = dict(states)
+            self._users.move_to_end(user)
+            while len(self._users) > self.max_users:
+                self._users.popitem(last=False)
@@ -0,0 +1,285 @@
+"""Mood x health x dish x modifier compatibility scores.
+
+Every dish and modifier is tagged from keyword rules (fried, sugary, salty,
+dairy, grain, ...). For each (mood, condition) pair a slab
+``score[dish, modifier]`` is computed with NumPy. It starts from the
+condition's penalties for the dish's tags, adds a bonus where the modifier
+addresses that concern, and is ``-inf`` where the combination contradicts
+itself: "Sugar-free jalebi", "No-added-salt papad", "Dairy-free paneer
+tikka", "Air-fried shikanji", "Steam-cooked jalebi", a modifier for a
+concern the dish doesn't have ("Sugar-free samosa", "Grilled khichdi", a
+grain swap on a dish with no grain), a food swap for a food the dish
+doesn't contain ("Low-fat paneer fruit chaat"), or a modifier that repeats
+the dish's own name ("Grilled grilled cheese"). Slabs are stacked into one dense ``(moods,
+conditions, max_pool, max_modifiers)`` array, indexed by a dish's position
+in its mood pool and a modifier's position in its condition list.
+
+``update`` rebuilds only the slabs whose mood pool or condition list changed,
+so a catalog hot-reload costs as much as the edit. ``top_k`` and
+``pick_modifier`` are vectorised lookups on the matrix.
+"""
+import re
+import threading
+import zlib
+
+import numpy as np
+
+from .engine import _folds
+
+# ---- tags ----
+(FRIED, SUGARY, SALTY, DAIRY, GRAIN, HEAVY, DRINK, FROZEN,
+ SYRUPY, CURED) = (1 << i for i in range(10))
+SUGAR_FREE, LOW_SODIUM, LOW_FAT, NON_FRIED, DAIRY_FREE, GRAIN_SWAP, SALTED = (1 << i for i in range(7))
+
+DISH_RULES = {
+    FRIED: ("samosa", "kachori", "bajji", "pakora", "vada", "puri", "bhature", "fries", "jalebi",
+            "manchurian", "nachos", "katsu", "chilli chicken", "chilli paneer", "tikki", "dabeli",
+            "spring rolls", "papad", "chakli", "mathri", "gulab jamun", "frankie"),
+    SUGARY: ("jalebi", "gulab jamun", "rasgulla", "rasmalai", "kheer", "halwa", "ice cream",
+             "chocolate", "shake", "ladoo", "chikki", "kesari", "sheera", "honey", "dates",
+             "date bars", "energy bars", "protein bars", "festival sweet", "badam milk",
+             "kesar milk", "mango", "lassi", "sherbet", "aam panna", "parfait"),
+    SALTY: ("papad", "achaar", "pickle", "chaat", "pav bhaji", "maggi", "schezwan", "ramen",
+            "manchurian", "nachos", "kimchi", "chips", "bhel", "sev puri", "pani puri",
+            "dahi puri", "misal", "chatpata", "street", "hot and sour", "manchow", "tteokbokki",
+            "teriyaki", "pho", "quesadilla", "burrito", "tacos", "khakhra", "salted", "neer mor"),
+    DAIRY: ("paneer", "cheese", "milk", "lassi", "curd", "yogurt", "raita", "ghee", "butter",
+            "kheer", "rasmalai", "rasgulla", "buttermilk", "chaas", "ice cream", "shake", "latte",
+            "kadhi", "mor", "parfait", "quesadilla", "halwa"),
+    GRAIN: ("rice", "naan", "paratha", "bhature", "pasta", "noodles", "biryani", "pulao", "dosa",
+            "bread", "roti", "poha", "upma", "khichdi", "kitchari", "idli", "uttapam", "pongal",
+            "oats", "oatmeal", "porridge", "dalia", "congee", "thepla", "toast", "sandwich",
+            "wrap", "roll", "frankie", "pav", "puttu", "appam", "adai", "pesarattu", "chapati",
+            "phulka", "mudde", "malt", "granola", "muesli", "quinoa", "millet", "barley",
+            "amaranth", "buckwheat", "bowl", "thali", "pizza", "taco", "burrito", "ramen", "udon",
+            "pad thai", "bibimbap", "banh mi", "sushi", "bath", "puliyogare", "sheera", "chilla",
+            "dhokla", "khandvi", "sabudana", "pulao", "grains", "carbs"),
+    HEAVY: ("butter chicken", "dal makhani", "chole bhature", "biryani", "mutton", "butter naan",
+            "cheese board", "charcuterie", "nachos supreme", "katsu"),
+    DRINK: ("tea", "juice", "water", "milk", "shake", "lassi", "smoothie", "chaas", "buttermilk",
+            "sherbet", "panna", "shikanji", "nimbu pani", "drink", "latte", "coffee", "malt",
+            "kanji", "neer mor", "sambharam", "lemonade", "ginger lemon honey"),
+    FROZEN: ("ice cream", "kulfi", "falooda", "sorbet", "gelato", "popsicle", "frozen"),
+    # the sugar or salt *is* the dish: it can't be made sugar-free / low-sodium
+    SYRUPY: ("jalebi", "gulab jamun", "rasgulla", "rasmalai", "honey", "dates", "date bars",
+             "chikki", "festival sweet", "sherbet", "mango"),
+    CURED: ("papad", "achaar", "pickle", "chips", "khakhra", "salted", "kimchi"),
+}
+
+MODIFIER_RULES = {
+    SUGAR_FREE: ("sugar-free", "no-added-sugar", "stevia", "low-sugar", "no refined sugar",
+                 "no sugary", "natural-sweetener"),
+    LOW_SODIUM: ("low-sodium", "no-added-salt", "salt-free", "sodium-aware", "no-pickle",
+                 "no-papad", "no-msg", "low-sauce"),
+    LOW_FAT: ("low-fat", "minimal oil", "low-oil", "minimal saturated", "no trans-fat",
+              "low-calorie"),
+    NON_FRIED: ("air-fried", "baked", "grilled", "steam-cooked", "non-fried", "no deep-fry"),
+    DAIRY_FREE: ("dairy-free", "low-dairy"),
+    GRAIN_SWAP: ("millet-based", "brown-rice", "oats-based", "barley-based", "quinoa-based",
+                 "whole-grain", "brown rice swap", "quinoa swap", "high-fiber roti",
+                 "millet-forward", "millet-moderate"),
+    SALTED: ("lightly salted", "healthy salted", "salted buttermilk", "salt-lime", "sea-salt",
+             "rock-salt"),
+}
+
+# condition -> {dish tag: penalty}
+PENALTIES = {
+    "Diabetes": {SUGARY: 4.0, FRIED: 1.0, GRAIN: 0.5},
+    "High BP": {SALTY: 4.0, FRIED: 1.0, HEAVY: 1.0},
+    "Low BP": {},
+    "PCOS": {SUGARY: 3.0, FRIED: 1.5, DAIRY: 0.5},
+    "Thyroid": {FRIED: 1.0, SUGARY: 1.0},
+    "Weight Loss": {FRIED: 3.0, SUGARY: 3.0, HEAVY: 2.0},
+    "Heart Issues": {FRIED: 4.0, HEAVY: 2.0, SALTY: 2.0},
+}
+
+# modifier tag -> dish tags it makes no sense on
+CONFLICTS = {SUGAR_FREE: SYRUPY, LOW_SODIUM: CURED, DAIRY_FREE: DAIRY, LOW_FAT: FRIED,
+             NON_FRIED: DRINK | FROZEN | SYRUPY, SALTED: SALTY}
+
+# modifier tag -> dish tag it needs: the concern it addresses
+REQUIRES = {SUGAR_FREE: SUGARY, LOW_SODIUM: SALTY, NON_FRIED: FRIED, GRAIN_SWAP: GRAIN}
+
+# modifier tag -> dish tag whose penalty it eases, by EASE of the penalty; a
+# fried dish stays fried, so it can't climb back above MIN_SCORE where frying
+# is the main concern (Heart Issues)
+MITIGATES = {NON_FRIED: FRIED, LOW_FAT: HEAVY, GRAIN_SWAP: GRAIN}
+EASE = 0.25
+
+# food swaps only fit dishes that contain the food: modifier keyword -> dish keywords
+SWAPS = {
+    "low-fat paneer": ("paneer",),
+    "greek-yogurt": ("yogurt", "curd", "raita", "lassi", "chaas", "buttermilk", "kadhi", "dahi"),
+    "low-fat dairy": DISH_RULES[DAIRY],
+}
+
+# below this a dish is not worth suggesting for the condition
+MIN_SCORE = -2.5
+# modifiers within this much of a dish's best one are equally good picks
+NEAR_BEST = 1.0
+
+
+def _pattern(words):
+    # keywords match at the start of a word: "tea" finds Green Tea, not Steamed
+    return re.compile(r"\b(?:" + "|".join(map(re.escape, words)) + ")")
+
+
+def _compile(rules):
+    return {tag: _pattern(words) for tag, words in rules.items()}
+
+
+_DISH_RE, _MODIFIER_RE = _compile(DISH_RULES), _compile(MODIFIER_RULES)
+_SWAP_RE = tuple((_pattern((mod,)), _pattern(food)) for mod, food in SWAPS.items())
+
+
+def _tags(name, patterns):
+    text = name.lower()
+    mask = 0
+    for tag, pattern in patterns.items():
+        if pattern.search(text):
+            mask |= tag
+    return mask
+
+
+def _words(name):
+    return {w for w in re.split(r"[^a-z0-9]+", name.lower()) if len(w) >= 3}
+
+
+def _bits(masks, tag):
+    return (masks & tag) != 0
+
+
+def compute_slab(dishes, modifiers, condition):
+    """``(len(dishes), max(1, len(modifiers)))`` scores for one (mood, condition)."""
+    d = np.array([_tags(x, _DISH_RE) for x in dishes], dtype=np.uint16)
+    penalties = PENALTIES.get(condition, {})
+    base = np.zeros(len(dishes), dtype=np.float32)
+    for tag, penalty in penalties.items():
+        base -= penalty * _bits(d, tag)
+    if condition == "Low BP":
+        base += 0.5 * _bits(d, SALTY)
+    if not modifiers:
+        return base[:, None].copy()
+
+    m = np.array([_tags(x, _MODIFIER_RE) for x in modifiers], dtype=np.uint16)
+    slab = np.repeat(base[:, None], len(modifiers), axis=1)
+    for mod_tag, dish_tag in MITIGATES.items():
+        eased = penalties.get(dish_tag, 0.0) * EASE
+        if eased:
+            slab += eased * (_bits(d, dish_tag)[:, None] & _bits(m, mod_tag)[None, :])
+    bad = np.zeros(slab.shape, dtype=bool)
+    for mod_tag, dish_tags in CONFLICTS.items():
+        bad |= _bits(d, dish_tags)[:, None] & _bits(m, mod_tag)[None, :]
+    for mod_tag, dish_tag in REQUIRES.items():
+        bad |= ~_bits(d, dish_tag)[:, None] & _bits(m, mod_tag)[None, :]
+    swaps = np.zeros(len(modifiers), dtype=bool)
+    for mod_re, dish_re in _SWAP_RE:
+        is_swap = np.array([bool(mod_re.search(x.lower())) for x in modifiers])
+        has_food = np.array([bool(dish_re.search(x.lower())) for x in dishes])
+        bad |= ~has_food[:, None] & is_swap[None, :]
+        swaps |= is_swap
+    # "Grilled grilled cheese", "Spinach-rich spinach soup"; a swap may share
+    # its food with the dish when the label can say it once ("Low-fat paneer tikka")
+    dish_words = [_words(x) for x in dishes]
+    mod_words = [_words(x) for x in modifiers]
+    for a, dw in enumerate(dish_words):
+        for b, mw in enumerate(mod_words):
+            if dw & mw and not (swaps[b] and _folds(dishes[a], modifiers[b])):
+                bad[a, b] = True
+    slab[bad] = -np.inf
+    return slab
+
+
+class Scorer:
+    def __init__(self, catalog=None):
+        self._slabs = {}  # (dish names, modifier names, condition) -> slab
+        self._lock = threading.Lock()
+        self.version = None
+        self.rebuilt = 0
+        if catalog is not None:
+            self.update(catalog)
+
+    def update(self, catalog):
+        """(Re)build the matrix for ``catalog``, reusing slabs whose inputs are unchanged."""
+        with self._lock:
+            if self.version != catalog.version:
+                self._build(catalog)
+        return self
+
+    def _build(self, catalog):
+        pools = [catalog.dishes_for(m) for m in catalog.moods]
+        mods = [catalog.modifiers_for(c) for c in catalog.conditions]
+        max_pool = max(len(p) for p in pools)
+        max_mods = max(1, max(len(x) for x in mods))
+        matrix = np.full((len(pools), len(mods), max_pool, max_mods), -np.inf,
+                         dtype=np.float32)
+        slabs = {}
+        for i, pool in enumerate(pools):
+            for j, (cond, mod) in enumerate(zip(catalog.conditions, mods)):
+                key = (pool, mod, cond)
+                slab = self._slabs.get(key)
+                if slab is None:
+                    slab = compute_slab(pool, mod, cond)
+                    self.rebuilt += 1
+                slabs[key] = slab
+                matrix[i, j, :slab.shape[0], :slab.shape[1]] = slab
+        self._slabs = slabs
+        # best modifier score per dish, for dish ranking
+        self.matrix, self.dish_scores = matrix, matrix.max(axis=3)
+        self.catalog, self.version = catalog, catalog.version
+
+    def _ij(self, mood, health):
+        return self.catalog.mood_id[mood], self.catalog.condition_id[health]
+
+    def compatible(self, mood, health):
+        """Boolean mask over the mood's pool."""
+        i, j = self._ij(mood, health)
+        n = len(self.catalog.mood_dishes[i])
+        return self.dish_scores[i, j, :n] >= MIN_SCORE
+
+    def top_k(self, mood, health, k, rng=None):
+        """Pool positions of the ``k`` best compatible dishes, best first.
+
+        With ``rng`` (a NumPy Generator) Gumbel noise is added to the scores, so
+        equally good dishes take turns instead of always winning in pool order.
+        """
+        i, j = self._ij(mood, health)
+        n = len(self.catalog.mood_dishes[i])
+        scores = self.dish_scores[i, j, :n].copy()
+        scores[scores < MIN_SCORE] = -np.inf
+        if rng is not None:
+            scores += rng.gumbel(size=n).astype(np.float32)
+        k = min(k, int(np.isfinite(scores).sum()))
+        if k <= 0:
+            return []
+        top = np.argpartition(-scores, k - 1)[:k]
+        return top[np.argsort(-scores[top])].tolist()
+
+    def _near_best(self, i, j, position):
+        """Modifier positions within ``NEAR_BEST`` of the dish's best, or None if none fits."""
+        n_mods = len(self.catalog.condition_modifiers[j])
+        if not n_mods:
+            return None
+        row = self.matrix[i, j, position, :n_mods]
+        best = row.max()
+        if not np.isfinite(best):
+            return None
+        return np.flatnonzero(row >= best - NEAR_BEST)
+
+    def pick_modifier(self, mood, health, position, rng):
+        """Position in the condition's modifier list, or None if it has none/no fit.
+
+        Picks uniformly among the modifiers within ``NEAR_BEST`` of the best.
+        """
+        choices = self._near_best(*self._ij(mood, health), position)
+        if choices is None:
+            return None
+        return int(choices[rng.integers(len(choices))])
+
+    def best_modifier(self, mood, health, position):
+        """Deterministic ``pick_modifier``: the same near-best modifier for a dish every time."""
+        i, j = self._ij(mood, health)
+        choices = self._near_best(i, j, position)
+        if choices is None:
+            return None
+        return int(choices[zlib.crc32(f"{i}:{j}:{position}".encode()) % len(choices)])
@@ -0,0 +1,136 @@
+"""Search over every dish and health modifier in the catalog.
+
+``SearchIndex`` is built once per catalog version. Names are split into
+lower-case word tokens; an inverted index maps tokens to entries, a sorted
+vocabulary answers prefix lookups with ``bisect`` and a trigram index finds
+tokens within a typo or two of the query. Every query term must match (exact,
+prefix or fuzzy, scored in that order), so "paneer" finds Paneer Tikka, Paneer
+Wrap, Tandoori Paneer and friends together with the moods they belong to.
+
+Per-term lookups are memoised, and a term that extends the previous keystroke
+("pane" -> "panee") is answered by filtering the shorter term's matches, so
+as-you-type refinement stays well under a millisecond.
+"""
+import re
+from bisect import bisect_left
+from collections import defaultdict
+from functools import lru_cache
+from typing import NamedTuple
+
+_WORD = re.compile(r"[a-z0-9]+")
+FUZZY_THRESHOLD = 0.3
+EXACT, PREFIX, FUZZY = 3.0, 2.0, 1.0
+MAX_REFINE = 32  # longer terms are looked up directly (refining recurses once per character)
+
+
+class Hit(NamedTuple):
+    kind: str   # "dish" or "modifier"
+    name: str
+    tags: tuple  # moods for a dish, conditions for a modifier
+    score: float
+
+
+def tokenize(text):
+    return _WORD.findall(text.lower())
+
+
+def trigrams(token):
+    padded = f"  {token} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class SearchIndex:
+    def __init__(self, catalog):
+        self.version = catalog.version
+        entries = []
+        for d, dish in enumerate(catalog.dishes):
+            moods = tuple(m for m, ids in zip(catalog.moods, catalog.mood_dishes) if d in ids)
+            entries.append(("dish", dish, moods))
+        for x, modifier in enumerate(catalog.modifiers):
+            conds = tuple(c for c, ids in zip(catalog.conditions, catalog.condition_modifiers)
+                          if x in ids)
+            entries.append(("modifier", modifier, conds))
+        self.entries = tuple(entries)
+
+        postings = defaultdict(set)
+        for e, (_, name, _) in enumerate(entries):
+            for token in tokenize(name):
+                postings[token].add(e)
+        self.postings = {t: frozenset(ids) for t, ids in postings.items()}
+        self.vocab = tuple(sorted(self.postings))
+
+        grams = defaultdict(set)
+        for token in self.vocab:
+            for g in trigrams(token):
+                grams[g].add(token)
+        self.grams = {g: tuple(tokens) for g, tokens in grams.items()}
+
+        self._term = lru_cache(maxsize=4096)(self._term_matches)
+        self._prefix = lru_cache(maxsize=4096)(self._prefix_tokens)
+
+    def _prefix_tokens(self, term):
+        if 1 < len(term) <= MAX_REFINE:
+            # refine the previous keystroke's answer instead of re-scanning
+            return tuple(t for t in self._prefix(term[:-1]) if t.startswith(term))
+        vocab = self.vocab
+        i = bisect_left(vocab, term)
+        out = []
+        while i < len(vocab) and vocab[i].startswith(term):
+            out.append(vocab[i])
+            i += 1
+        return tuple(out)
+
+    def _fuzzy_tokens(self, term):
+        grams = trigrams(term)
+        shared = defaultdict(int)
+        for g in grams:
+            for token in self.grams.get(g, ()):
+                shared[token] += 1
+        out = []
+        for token, n in shared.items():
+            if n / (len(grams) + len(trigrams(token)) - n) >= FUZZY_THRESHOLD:
+                out.append(token)
+        return out
+
+    def _term_matches(self, term):
+        """entry id -> best score for a single query term."""
+        scores = {}
+
+        def add(tokens, score):
+            for token in tokens:
+                for e in self.postings[token]:
+                    if scores.get(e, 0) < score:
+                        scores[e] = score
+
+        if len(term) >= 3:
+            add(self._fuzzy_tokens(term), FUZZY)
+        add(self._prefix(term), PREFIX)
+        if term in self.postings:
+            add((term,), EXACT)
+        return scores
+
+    def search(self, query, limit=20, kind=None):
+        terms = tokenize(query)
+        if not terms:
+            return []
+        total = None
+        for term in terms:
+            scores = self._term(term)
+            if total is None:
+                total = dict(scores)
+            else:
+                total = {e: s + scores[e] for e, s in total.items() if e in scores}
+            if not total:
+                return []
+        hits = []
+        for e, score in total.items():
+            k, name, tags = self.entries[e]
+            if kind is None or k == kind:
+                hits.append(Hit(k, name, tags, score))
+        hits.sort(key=lambda h: (-h.score, h.kind != "dish", h.name))
+        return hits[:limit]
+
+    def cache_stats(self):
+        """``(hits, misses)`` of the per-term result cache."""
+        info = self._term.cache_info()
+        return info.hits, info.misses
@@ -0,0 +1,205 @@
+"""Per-user state shared by every app worker process.
+
+``st.session_state`` lives in one process, so a user's picks and rotation
+only survive as long as the load balancer keeps them on the same worker.
+``SharedState`` keeps that state in a backend instead: ``MemoryBackend``
+(one process; the default) or ``RedisBackend`` (any Redis-protocol server,
+shared by all workers).
+
+Every key carries a version that the backend bumps on each write. Reads go
+through a local cache: an entry is served without asking the backend for
+``max_stale`` seconds, then revalidated by fetching only the version number,
+and the value is fetched again only when the version moved. A worker's own
+writes update its cache immediately, so a user who stays on one worker never
+waits on the network to read back what they just did.
+
+``MemoryBackend`` forgets a key ``ttl`` seconds after its last write, and
+the least recently used keys beyond ``maxsize``, as Redis would with an
+expiry and an eviction policy. ``RedisBackend`` bumps the version and writes
+the value in one MULTI/EXEC transaction, so a reader never sees a version
+without its value.
+
+``RedisBackend`` needs the ``redis`` package; ``make_state`` falls back to
+the in-process backend without it or without a ``redis_url`` secret.
+``moodfood.stubs.RedisStub`` is a local stand-in for tests.
+"""
+import json
+import threading
+import time
+from collections import OrderedDict
+
+from .config import get_secret
+
+
+class MemoryBackend:
+    def __init__(self, maxsize=100000, ttl=30 * 24 * 3600, clock=time.monotonic):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.clock = clock
+        self._data = OrderedDict()  # key -> (version, json, expires), least recent first
+        # one counter for all keys: a key that was evicted and written again
+        # never reuses a version some SharedState still has cached
+        self._version = 0
+        self._lock = threading.Lock()
+
+    def _entry(self, key, now):
+        entry = self._data.get(key)
+        if entry is None:
+            return 0, None
+        if entry[2] <= now:
+            del self._data[key]
+            return 0, None
+        self._data.move_to_end(key)
+        return entry[:2]
+
+    def _write(self, key, raw):
+        now = self.clock()
+        with self._lock:
+            self._version += 1
+            self._data[key] = (self._version, raw, now + self.ttl)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+            return self._version
+
+    def versions(self, keys):
+        now = self.clock()
+        with self._lock:
+            return [self._entry(k, now)[0] for k in keys]
+
+    def get(self, key):
+        """``(version, value)``; version 0 means the key was never written (or expired)."""
+        now = self.clock()
+        with self._lock:
+            version, raw = self._entry(key, now)
+        return version, None if raw is None else json.loads(raw)
+
+    def set(self, key, value):
+        """Store ``value`` and return its new version."""
+        return self._write(key, json.dumps(value))
+
+    def delete(self, key):
+        return self._write(key, None)
+
+
+class RedisBackend:
+    """Version counter at ``<prefix><key>:v``, JSON value at ``<prefix><key>:d``."""
+
+    def __init__(self, client, prefix="moodfood:", ttl=30 * 24 * 3600):
+        self.client = client
+        self.prefix = prefix
+        self.ttl = ttl
+
+    def versions(self, keys):
+        if not keys:
+            return []
+        return [int(v or 0) for v in self.client.mget([f"{self.prefix}{k}:v" for k in keys])]
+
+    def get(self, key):
+        name = f"{self.prefix}{key}"
+        version, raw = self.client.mget([f"{name}:v", f"{name}:d"])
+        return int(version or 0), None if raw is None else json.loads(raw)
+
+    def _write(self, key, raw):
+        name = f"{self.prefix}{key}"
+        pipe = self.client.pipeline(transaction=True)  # MULTI ... EXEC
+        pipe.incr(f"{name}:v")
+        if raw is None:
+            pipe.delete(f"{name}:d")
+        else:
+            pipe.set(f"{name}:d", raw, ex=self.ttl)
+        pipe.expire(f"{name}:v", self.ttl)
+        return pipe.execute()[0]
+
+    def set(self, key, value):
+        return self._write(key, json.dumps(value))
+
+    def delete(self, key):
+        return self._write(key, None)
+
+
+class SharedState:
+    def __init__(self, backend=None, max_stale=1.0, maxsize=10000, clock=time.monotonic):
+        self.backend = backend or MemoryBackend()
+        self.max_stale = max_stale
+        self.maxsize = maxsize
+        self.clock = clock
+        self.hits = 0         # served locally without asking the backend
+        self.revalidated = 0  # served locally after a version check
+        self.misses = 0       # value fetched from the backend
+        self._local = OrderedDict()  # key -> [version, value, checked]
+        self._lock = threading.Lock()
+
+    def _put(self, key, version, value, now):
+        # caller holds the lock
+        self._local[key] = [version, value, now]
+        self._local.move_to_end(key)
+        while len(self._local) > self.maxsize:
+            self._local.popitem(last=False)
+
+    def _store(self, key, version, value, now):
+        with self._lock:
+            self._put(key, version, value, now)
+
+    def get(self, key, default=None):
+        return self.get_many([key], default)[0]
+
+    def get_many(self, keys, default=None):
+        """Values for ``keys``; stale entries are revalidated with one version lookup."""
+        now = self.clock()
+        out, stale = [default] * len(keys), []
+        with self._lock:
+            for n, key in enumerate(keys):
+                entry = self._local.get(key)
+                if entry is not None and now - entry[2] < self.max_stale:
+                    self.hits += 1
+                    out[n] = default if entry[1] is None else entry[1]
+                else:
+                    stale.append(n)
+        if not stale:
+            return out
+        versions = self.backend.versions([keys[n] for n in stale])
+        for n, version in zip(stale, versions):
+            key = keys[n]
+            with self._lock:
+                entry = self._local.get(key)
+                if entry is not None and entry[0] == version:
+                    entry[2] = now
+                    self.revalidated += 1
+                    out[n] = default if entry[1] is None else entry[1]
+                    continue
+                if version == 0:
+                    # never written anywhere: remember that without fetching
+                    self._put(key, 0, None, now)
+                    continue
+                self.misses += 1
+            version, value = self.backend.get(key)
+            self._store(key, version, value, now)
+            out[n] = default if value is None else value
+        return out
+
+    def set(self, key, value):
+        self._store(key, self.backend.set(key, value), value, self.clock())
+
+    def delete(self, key):
+        self._store(key, self.backend.delete(key), None, self.clock())
+
+    def invalidate(self, key=None):
+        """Drop the local copy of ``key`` (or everything); the next read goes to the backend."""
+        with self._lock:
+            if key is None:
+                self._local.clear()
+            else:
+                self._local.pop(key, None)
+
+
+def make_state(secrets=None, max_stale=1.0):
+    url = get_secret("redis_url", secrets)
+    if url:
+        try:
+            import redis
+        except ImportError:
+            pass
+        else:
+            return SharedState(RedisBackend(redis.Redis.from_url(url)), max_stale=max_stale)
+    return SharedState(MemoryBackend(), max_stale=max_stale)
@@ -0,0 +1,373 @@
+"""Local stand-ins for the external services, for offline tests and load runs.
+
+Each stub is a tiny HTTP server on ``127.0.0.1`` with a random port, started
+in a daemon thread; use it as a context manager and point the matching client
+at ``stub.url``. Responses are deterministic per input, an optional ``delay``
+simulates network latency, and ``requests`` counts what reached the server.
+``FakeModel`` is the in-process equivalent for the LLM client, and
+``RedisStub`` speaks enough of the Redis protocol for ``moodfood.state``.
+"""
+import hashlib
+import json
+import socketserver
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+
+def _seeded(text, lo, hi):
+    n = int.from_bytes(hashlib.sha256(text.lower().encode("utf-8")).digest()[:4], "big")
+    return lo + (hi - lo) * (n / 0xFFFFFFFF)
+
+
+class StubServer:
+    def __init__(self, delay=0.0):
+        self.delay = delay
+        self.requests = 0
+        self._lock = threading.Lock()
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def _dispatch(self, method):
+                with stub._lock:
+                    stub.requests += 1
+                if stub.delay:
+                    time.sleep(stub.delay)
+                url = urlparse(self.path)
+                query = {k: v[-1] for k, v in parse_qs(url.query).items()}
+                length = int(self.headers.get("Content-Length") or 0)
+                body = self.rfile.read(length) if length else b""
+                status, payload, ctype, *extra = stub.handle(method, url.path, query, body,
+                                                             self.headers)
+                data = payload if isinstance(payload, bytes) else json.dumps(payload).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", ctype)
+                for name, value in (extra[0] if extra else {}).items():
+                    self.send_header(name, value)
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def do_GET(self):
+                self._dispatch("GET")
+
+            def do_POST(self):
+                self._dispatch("POST")
+
+            def log_message(self, *args):
+                pass
+
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self._server.daemon_threads = True
+        self.url = f"http://127.0.0.1:{self._server.server_address[1]}"
+        self._thread = None
+
+    def handle(self, method, path, query, body, headers):
+        """Return ``(status, payload, content_type[, headers])``; payload is JSON-able or bytes."""
+        return 404, {"error": "not found"}, "application/json"
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+class NutritionStub(StubServer):
+    """Answers both the Edamam nutrition-data and USDA foods/search endpoints."""
+
+    def handle(self, method, path, query, body, headers):
+        if path == "/api/nutrition-data":
+            dish = query.get("ingr", "").removeprefix("1 serving ")
+            return 200, {
+                "calories": round(_seeded(dish, 80, 650)),
+                "totalNutrients": {
+                    "PROCNT": {"quantity": _seeded(dish + "p", 1, 35), "unit": "g"},
+                    "CHOCDF": {"quantity": _seeded(dish + "c", 5, 90), "unit": "g"},
+                    "FAT": {"quantity": _seeded(dish + "f", 0, 40), "unit": "g"},
+                    "NA": {"quantity": _seeded(dish + "n", 5, 1500), "unit": "mg"},
+                },
+            }, "application/json"
+        if path == "/fdc/v1/foods/search":
+            dish = query.get("query", "")
+            nutrients = [
+                {"nutrientNumber": "208", "value": round(_seeded(dish, 80, 650))},
+                {"nutrientNumber": "203", "value": _seeded(dish + "p", 1, 35)},
+                {"nutrientNumber": "205", "value": _seeded(dish + "c", 5, 90)},
+                {"nutrientNumber": "204", "value": _seeded(dish + "f", 0, 40)},
+                {"nutrientNumber": "307", "value": _seeded(dish + "n", 5, 1500)},
+            ]
+            return 200, {"foods": [{"description": dish, "foodNutrients": nutrients}]}, "application/json"
+        return super().handle(method, path, query, body, headers)
+
+
+def _fake_answer(prompt):
+    words = ("A balanced, comforting choice that fits the moment; "
+             "prep it fresh and keep the portion light.").split()
+    n = int(_seeded(prompt, 0, len(words) - 1))
+    return words[n:] + words[:n]
+
+
+class FakeModel:
+    """In-process stand-in for ``GeminiClient``: deterministic words, optional delays."""
+
+    def __init__(self, first_token_delay=0.0, token_delay=0.0):
+        self.first_token_delay = first_token_delay
+        self.token_delay = token_delay
+        self.calls = 0
+
+    def stream(self, prompt):
+        self.calls += 1
+        if self.first_token_delay:
+            time.sleep(self.first_token_delay)
+        for i, word in enumerate(_fake_answer(prompt)):
+            if i and self.token_delay:
+                time.sleep(self.token_delay)
+            yield word if i == 0 else " " + word
+
+
+class GeminiStub(StubServer):
+    """Serves ``:streamGenerateContent?alt=sse`` the way the Gemini REST API does."""
+
+    def handle(self, method, path, query, body, headers):
+        if method == "POST" and path.endswith(":streamGenerateContent"):
+            prompt = json.loads(body)["contents"][0]["parts"][0]["text"]
+            words = _fake_answer(prompt)
+            events = []
+            for i in range(0, len(words), 4):
+                text = " ".join(words[i:i + 4]) + (" " if i + 4 < len(words) else "")
+                chunk = {"candidates": [{"content": {"parts": [{"text": text}], "role": "model"}}]}
+                events.append(f"data: {json.dumps(chunk)}\r\n\r\n")
+            return 200, "".join(events).encode("utf-8"), "text/event-stream"
+        return super().handle(method, path, query, body, headers)
+
+
+class TwilioStub(StubServer):
+    """Accepts ``Messages.json`` posts; every ``fail_every``-th one gets a 503."""
+
+    def __init__(self, delay=0.0, fail_every=0):
+        super().__init__(delay)
+        self.fail_every = fail_every
+        self.messages = []
+
+    def handle(self, method, path, query, body, headers):
+        if method == "POST" and path.endswith("/Messages.json"):
+            form = {k: v[-1] for k, v in parse_qs(body.decode("utf-8")).items()}
+            with self._lock:
+                n = self.requests
+                if self.fail_every and n % self.fail_every == 0:
+                    return 503, {"code": 20503, "message": "Service unavailable"}, "application/json"
+                self.messages.append(form)
+            return 201, {"sid": f"SM{n:032x}", "status": "queued", "to": form.get("To")}, "application/json"
+        return super().handle(method, path, query, body, headers)
+
+
+class OIDCStub(StubServer):
+    """Minimal OpenID provider: discovery, JWKS, and a token endpoint.
+
+    ``issue(claims)`` mints an RS256 ID token signed with the stub's key; a code
+    from ``authorize(claims)`` can be exchanged at the token endpoint. Needs
+    ``PyJWT[crypto]``.
+    """
+
+    def __init__(self, client_id="test-client", delay=0.0, max_age=3600):
+        super().__init__(delay)
+        from cryptography.hazmat.primitives.asymmetric import rsa
+
+        self.client_id = client_id
+        self.max_age = max_age
+        self.kid = "stub-key-1"
+        self._key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+        self._codes = {}
+        self.jwks_fetches = 0
+
+    def issue(self, claims=None, ttl=3600):
+        import jwt
+
+        now = int(time.time())
+        payload = {"iss": self.url, "aud": self.client_id, "sub": "stub-user",
+                   "email": "user@example.com", "name": "Stub User", "iat": now, "exp": now + ttl}
+        payload.update(claims or {})
+        return jwt.encode(payload, self._key, algorithm="RS256", headers={"kid": self.kid})
+
+    def authorize(self, claims=None):
+        code = hashlib.sha256(f"{time.time()}{len(self._codes)}".encode()).hexdigest()[:16]
+        self._codes[code] = self.issue(claims)
+        return code
+
+    def handle(self, method, path, query, body, headers):
+        if path == "/.well-known/openid-configuration":
+            return 200, {
+                "issuer": self.url,
+                "authorization_endpoint": f"{self.url}/authorize",
+                "token_endpoint": f"{self.url}/token",
+                "jwks_uri": f"{self.url}/jwks",
+            }, "application/json", {"Cache-Control": f"public, max-age={self.max_age}"}
+        if path == "/jwks":
+            import jwt
+
+            with self._lock:
+                self.jwks_fetches += 1
+            jwk = json.loads(jwt.algorithms.RSAAlgorithm.to_jwk(self._key.public_key()))
+            jwk.update(kid=self.kid, alg="RS256", use="sig")
+            return 200, {"keys": [jwk]}, "application/json", {
+                "Cache-Control": f"public, max-age={self.max_age}"}
+        if method == "POST" and path == "/token":
+            form = {k: v[-1] for k, v in parse_qs(body.decode("utf-8")).items()}
+            token = self._codes.pop(form.get("code"), None)
+            if token is None:
+                return 400, {"error": "invalid_grant"}, "application/json"
+            return 200, {"id_token": token, "token_type": "Bearer"}, "application/json"
+        return super().handle(method, path, query, body, headers)
+
+
+class RedisStub:
+    """In-memory Redis-protocol server: GET/SET/MGET, INCR, EXPIRE, DEL, MULTI/EXEC.
+
+    Speaks RESP2, or RESP3 after ``HELLO 3`` (the default of recent redis-py).
+    Point a ``redis.Redis`` at ``stub.url``; ``requests`` counts commands.
+    """
+
+    def __init__(self, delay=0.0):
+        self.delay = delay
+        self.requests = 0
+        self._data = {}  # key -> (value bytes, expires or None)
+        self._lock = threading.Lock()
+        stub = self
+
+        class Handler(socketserver.StreamRequestHandler):
+            def _read(self):
+                line = self.rfile.readline()
+                if not line:
+                    return None
+                if not line.startswith(b"*"):
+                    return line.split()  # inline command, e.g. from telnet
+                args = []
+                for _ in range(int(line[1:])):
+                    size = int(self.rfile.readline()[1:])
+                    args.append(self.rfile.read(size + 2)[:-2])
+                return args
+
+            def handle(self):
+                proto, queued = 2, None
+                while True:
+                    args = self._read()
+                    if args is None:
+                        return
+                    if not args:
+                        continue
+                    name = args[0].upper()
+                    if name == b"HELLO":
+                        proto = int(args[1]) if len(args) > 1 else proto
+                        reply = {"server": b"redis", "version": b"7.2.0", "proto": proto}
+                    elif name == b"MULTI":
+                        queued, reply = [], _Status("OK")
+                    elif name == b"EXEC" and queued is not None:
+                        queued, reply = None, [stub._execute(cmd) for cmd in queued]
+                    elif name == b"DISCARD":
+                        queued, reply = None, _Status("OK")
+                    elif queued is not None:
+                        queued.append(args)
+                        reply = _Status("QUEUED")
+                    else:
+                        reply = stub._execute(args)
+                    self.wfile.write(_encode(reply, proto))
+
+        self._server = socketserver.ThreadingTCPServer(("127.0.0.1", 0), Handler)
+        self._server.daemon_threads = True
+        self.url = f"redis://127.0.0.1:{self._server.server_address[1]}/0"
+        self._thread = None
+
+    def _live(self, key):
+        entry = self._data.get(key)
+        if entry is not None and entry[1] is not None and entry[1] <= time.time():
+            del self._data[key]
+            entry = None
+        return entry
+
+    def _value(self, key):
+        entry = self._live(key)
+        return None if entry is None else entry[0]
+
+    def _execute(self, args):
+        with self._lock:
+            self.requests += 1
+        if self.delay:
+            time.sleep(self.delay)
+        name, args = args[0].upper().decode(), args[1:]
+        with self._lock:
+            if name == "PING":
+                return _Status("PONG")
+            if name in ("CLIENT", "SELECT"):
+                return _Status("OK")
+            if name == "GET":
+                return self._value(args[0])
+            if name == "MGET":
+                return [self._value(k) for k in args]
+            if name == "SET":
+                options = [a.upper() for a in args[2:]]
+                ttl = float(args[3 + options.index(b"EX")]) if b"EX" in options else None
+                self._data[args[0]] = (args[1], time.time() + ttl if ttl else None)
+                return _Status("OK")
+            if name in ("INCR", "INCRBY"):
+                entry = self._live(args[0])
+                value = (int(entry[0]) if entry else 0) + (int(args[1]) if name == "INCRBY" else 1)
+                self._data[args[0]] = (str(value).encode(), entry[1] if entry else None)
+                return value
+            if name == "DEL":
+                return sum(self._data.pop(k, None) is not None for k in args)
+            if name == "EXPIRE":
+                entry = self._live(args[0])
+                if entry is None:
+                    return 0
+                self._data[args[0]] = (entry[0], time.time() + float(args[1]))
+                return 1
+        return ValueError(f"ERR unknown command '{name}'")
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+class _Status(str):
+    pass
+
+
+def _encode(value, proto):
+    if value is None:
+        return b"_\r\n" if proto == 3 else b"$-1\r\n"
+    if isinstance(value, _Status):
+        return b"+%s\r\n" % value.encode()
+    if isinstance(value, Exception):
+        return b"-%s\r\n" % str(value).encode()
+    if isinstance(value, int):
+        return b":%d\r\n" % value
+    if isinstance(value, (bytes, str)):
+        value = value.encode() if isinstance(value, str) else value
+        return b"$%d\r\n%s\r\n" % (len(value), value)
+    if isinstance(value, dict):
+        items = [x for kv in value.items() for x in kv]
+        head = b"%%%d\r\n" % len(value) if proto == 3 else b"*%d\r\n" % len(items)
+        return head + b"".join(_encode(x, proto) for x in items)
+    return b"*%d\r\n" % len(value) + b"".join(_encode(x, proto) for x in value)
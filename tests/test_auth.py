@@ -0,0 +1,76 @@
+import time
+
+import pytest
+
+pytest.importorskip("httpx")
+jwt = pytest.importorskip("jwt")
+
+from moodfood.auth import AuthError, GoogleAuth  # noqa: E402
+from moodfood.stubs import OIDCStub  # noqa: E402
+
+
+@pytest.fixture
+def provider():
+    with OIDCStub() as stub:
+        yield stub
+
+
+class Clock:
+    def __init__(self):
+        self.now = time.time()
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock():
+    return Clock()
+
+
+def _auth(provider, clock):
+    return GoogleAuth(provider.client_id, "secret", "http://localhost:8501",
+                      issuer=provider.url, clock=clock)
+
+
+def test_repeated_verify_is_a_cache_hit(provider, clock, monkeypatch):
+    auth = _auth(provider, clock)
+    token = provider.issue()
+    assert auth.verify(token)["sub"] == "stub-user"
+
+    decodes = []
+    decode = jwt.decode
+    monkeypatch.setattr(jwt, "decode", lambda *a, **k: decodes.append(1) or decode(*a, **k))
+    for _ in range(3):
+        assert auth.verify(token)["sub"] == "stub-user"
+    assert decodes == []
+    assert provider.jwks_fetches == 1
+
+
+def test_unknown_kid_refreshes_jwks(provider, clock):
+    from cryptography.hazmat.primitives.asymmetric import rsa
+
+    auth = _auth(provider, clock)
+    auth.verify(provider.issue())
+    provider._key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    provider.kid = "stub-key-2"
+    rotated = provider.issue()
+
+    # at most one early refresh a minute
+    with pytest.raises(AuthError):
+        auth.verify(rotated)
+    assert provider.jwks_fetches == 1
+
+    clock.now += 61
+    assert auth.verify(rotated)["sub"] == "stub-user"
+    assert provider.jwks_fetches == 2
+
+
+def test_state_is_bound_to_the_browser_and_single_use(provider, clock):
+    from urllib.parse import parse_qs, urlparse
+
+    auth = _auth(provider, clock)
+    state = parse_qs(urlparse(auth.authorize_url("browser-a")).query)["state"][0]
+    assert not auth.check_state(state, "browser-b")
+    assert auth.check_state(state, "browser-a")
+    assert not auth.check_state(state, "browser-a")
@@ -0,0 +1,34 @@
+import pytest
+
+from moodfood.catalog import get_catalog
+from moodfood.engine import _check, recommend
+
+
+def test_same_seed_gives_the_same_picks():
+    catalog = get_catalog()
+    for mood in catalog.moods[:3]:
+        for health in ("None", "Diabetes"):
+            first = recommend(mood, health, 5, seed=42, catalog=catalog)
+            assert recommend(mood, health, 5, seed=42, catalog=catalog) == first
+            assert len({rec.dish for rec in first}) == 5
+
+
+def test_different_seeds_differ():
+    mood = get_catalog().moods[0]
+    picks = {tuple(recommend(mood, "None", 5, seed=seed)) for seed in range(5)}
+    assert len(picks) > 1
+
+
+@pytest.mark.parametrize("mood, health, count, error", [
+    ("Nope", "None", 3, KeyError),
+    (None, "Nope", 3, KeyError),
+    (None, "None", 0, ValueError),
+    (None, "None", -1, ValueError),
+    (None, "None", 10 ** 6, ValueError),
+])
+def test_check_rejects_bad_input(mood, health, count, error):
+    catalog = get_catalog()
+    with pytest.raises(error):
+        _check(catalog, mood or catalog.moods[0], health, count)
+    with pytest.raises(error):
+        recommend(mood or catalog.moods[0], health, count, catalog=catalog)
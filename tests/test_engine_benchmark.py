@@ -0,0 +1,49 @@
+"""Latency of ``recommend`` and throughput of ``recommend_batch``.
+
+    python -m pytest tests/test_engine_benchmark.py --benchmark-columns=min,median,ops
+
+Needs ``pytest-benchmark``; ``--benchmark-skip`` leaves these out of a plain
+test run.
+"""
+import itertools
+import random
+
+import pytest
+
+pytest.importorskip("pytest_benchmark")
+
+from moodfood.catalog import get_catalog  # noqa: E402
+from moodfood.engine import recommend, recommend_batch  # noqa: E402
+
+BATCH = 5000
+
+
+def _workload(catalog, n, seed=0):
+    rng = random.Random(seed)
+    return [(rng.choice(catalog.moods), rng.choice(catalog.conditions), rng.randint(1, 5))
+            for _ in range(n)]
+
+
+@pytest.fixture(scope="module")
+def catalog():
+    return get_catalog()
+
+
+def test_recommend_latency(benchmark, catalog):
+    requests = itertools.cycle(_workload(catalog, 1000))
+
+    def call():
+        mood, health, count = next(requests)
+        return recommend(mood, health, count, catalog=catalog)
+
+    picks = benchmark(call)
+    assert picks
+
+
+def test_recommend_batch_throughput(benchmark, catalog):
+    pytest.importorskip("numpy")
+    requests = _workload(catalog, BATCH)
+    results = benchmark.pedantic(recommend_batch, args=(requests,), kwargs={"catalog": catalog},
+                                 rounds=5, warmup_rounds=1)
+    assert len(results) == BATCH
+    benchmark.extra_info["requests_per_s"] = round(BATCH / benchmark.stats.stats.min)
@@ -0,0 +1,28 @@
+from moodfood.explain import Explainer
+from moodfood.stubs import FakeModel
+
+
+def test_repeated_explanation_is_served_from_cache():
+    model = FakeModel()
+    explainer = Explainer(model)
+
+    first = explainer.explain("Happy", "Diabetes", "Masala Dosa")
+    assert explainer.explain("Happy", "Diabetes", "Masala Dosa") == first
+    assert model.calls == 1
+    assert (explainer.cache.hits, explainer.cache.misses) == (1, 1)
+
+    explainer.explain("Happy", "None", "Masala Dosa")
+    assert model.calls == 2
+
+
+def test_interrupted_stream_is_not_cached():
+    model = FakeModel()
+    explainer = Explainer(model)
+
+    stream = explainer.stream("Sad", "None", "Khichdi")
+    next(stream)
+    stream.close()
+    assert explainer.cache.get(("Sad", "None", "Khichdi")) is None
+
+    explainer.explain("Sad", "None", "Khichdi")
+    assert model.calls == 2
@@ -0,0 +1,25 @@
+from moodfood.favorites import FavoritesStore
+
+
+def test_saves_are_visible_to_another_store_on_the_same_file(tmp_path):
+    path = str(tmp_path / "favorites.db")
+    a = FavoritesStore(path)
+    b = FavoritesStore(path)
+    try:
+        assert a.count("u") == 0
+        for n in range(12):
+            assert b.add("u", f"dish{n}")
+        assert not b.add("u", "dish0")
+        b.flush()
+
+        assert a.count("u") == 12
+        assert a.contains("u", "dish0")
+        assert not a.add("u", "dish0")
+        assert a.page("u", 1, 10) == ["dish10", "dish11"]
+
+        a.remove("u", "dish0")
+        assert b.count("u") == 11
+        assert b.add("u", "dish0")
+    finally:
+        a.close()
+        b.close()
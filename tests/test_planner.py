@@ -0,0 +1,68 @@
+import pytest
+
+pytest.importorskip("numpy")
+
+from moodfood.catalog import get_catalog  # noqa: E402
+from moodfood.planner import BUDGETS, Planner  # noqa: E402
+from moodfood.scoring import _DISH_RE, _tags  # noqa: E402
+
+SEED = 7
+NO_REPEAT_DAYS = 4
+
+
+@pytest.fixture(scope="module")
+def planner():
+    return Planner(get_catalog())
+
+
+def _plans(planner, health):
+    # generous time budget, so the fixed seed gives the same plan on a slow machine
+    return [planner.plan(mood, health, seed=SEED, no_repeat_days=NO_REPEAT_DAYS, time_budget=5.0)
+            for mood in planner.catalog.moods]
+
+
+@pytest.mark.parametrize("health", ["None", "High BP", "Diabetes"])
+def test_no_dish_repeats_within_the_window(planner, health):
+    for plan in _plans(planner, health):
+        last_seen = {}
+        for d, day in enumerate(plan.days):
+            for meal in day.meals:
+                if meal.dish in last_seen:
+                    assert d - last_seen[meal.dish] >= NO_REPEAT_DAYS, (day.mood, meal.dish)
+                last_seen[meal.dish] = d
+
+
+@pytest.mark.parametrize("health", ["High BP", "Diabetes"])
+def test_daily_budget_holds(planner, health):
+    for plan in _plans(planner, health):
+        for day in plan.days:
+            tags = [_tags(meal.dish, _DISH_RE) for meal in day.meals]
+            for tag, limit in BUDGETS[health].items():
+                assert sum(1 for t in tags if t & tag) <= limit, (day.mood, day.day)
+
+
+@pytest.mark.parametrize("health", ["None", "High BP", "Diabetes", "Heart Issues"])
+def test_nothing_relaxed_on_the_default_catalog(planner, health):
+    assert all(plan.relaxed == 0 for plan in _plans(planner, health))
+
+
+def test_relaxing_repeats_keeps_the_budget(planner):
+    import copy
+
+    import numpy as np
+
+    from moodfood.scoring import FRIED, SALTY
+
+    health = "Heart Issues"
+    pool = copy.copy(planner._pool(planner.catalog.moods[0], health))
+    fried = np.flatnonzero(pool.tags & FRIED)[:3]
+    plain = np.flatnonzero((pool.tags & (FRIED | SALTY)) == 0)[:4]
+    # too few dishes for a 4-day window: repeats must give way, the fried budget must not
+    pool.ok = np.zeros_like(pool.ok)
+    pool.ok[np.concatenate([fried, plain])] = True
+    picks, _, relaxed = planner._construct([pool] * 7, BUDGETS[health], NO_REPEAT_DAYS,
+                                           np.random.default_rng(SEED), 0.0)
+    assert relaxed > 0
+    for day in picks:
+        assert len(set(day)) == len(day)
+        assert not any(pool.tags[k] & FRIED for k in day)
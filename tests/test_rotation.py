@@ -0,0 +1,66 @@
+import pytest
+
+from moodfood.catalog import get_catalog
+from moodfood.engine import pair_id, recommend
+from moodfood.rotation import Rotation
+
+
+def _first_round(draw, size, count):
+    picks = []
+    while len(picks) < size:
+        picks += draw(count)
+    return picks[:size]
+
+
+def test_no_repeats_until_the_pool_is_used_up():
+    rotation = Rotation()
+    for size, count in [(1, 1), (7, 3), (50, 3), (97, 5)]:
+        picks = _first_round(lambda k: rotation.draw("u", size, size, k), size, count)
+        assert sorted(picks) == list(range(size))
+
+
+@pytest.mark.parametrize("scored", [False, True])
+def test_recommend_rotates_through_the_pool(scored):
+    catalog = get_catalog()
+    mood, health = catalog.moods[0], "Diabetes"
+    scorer = None
+    size = len(catalog.dishes_for(mood))
+    if scored:
+        pytest.importorskip("numpy")
+        from moodfood.scoring import Scorer
+
+        scorer = Scorer(catalog)
+        size = int(scorer.compatible(mood, health).sum())
+    rotation = Rotation()
+
+    def draw(count):
+        return [rec.dish for rec in recommend(mood, health, count, catalog=catalog,
+                                              rotation=rotation, user="u", scorer=scorer)]
+
+    picks = _first_round(draw, size, 3)
+    assert len(set(picks)) == size
+
+
+def test_restore_resumes_the_round_and_resets_on_a_new_pool_size():
+    catalog = get_catalog()
+    pair = pair_id(catalog, catalog.moods[0], "None")
+    first = Rotation()
+    shown = first.draw("u", pair, 50, 10)
+
+    second = Rotation()
+    second.restore("u", first.export("u"))
+    assert second.seen("u", pair) == 10
+    rest = _first_round(lambda k: second.draw("u", pair, 50, k), 40, 5)
+    assert sorted(shown + rest) == list(range(50))
+
+    second.restore("u", first.export("u"))
+    second.draw("u", pair, 40, 3)  # the catalog changed the pool: start over
+    assert second.seen("u", pair) == 3
+
+
+def test_restore_keeps_max_users():
+    rotation = Rotation(max_users=2)
+    for user in ("a", "b", "c"):
+        rotation.restore(user, {1: 0})
+    assert rotation.export("a") == {}
+    assert rotation.export("c") == {1: 0}
@@ -0,0 +1,25 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from moodfood.catalog import get_catalog  # noqa: E402
+from moodfood.scoring import _DISH_RE, _MODIFIER_RE, FRIED, NON_FRIED, Scorer, _tags  # noqa: E402
+
+
+def test_cooking_method_modifiers_only_land_on_fried_dishes():
+    catalog = get_catalog()
+    scorer = Scorer(catalog)
+    bad = []
+    for i, mood in enumerate(catalog.moods):
+        dishes = catalog.dishes_for(mood)
+        fried = np.array([bool(_tags(d, _DISH_RE) & FRIED) for d in dishes])
+        for j, condition in enumerate(catalog.conditions):
+            modifiers = catalog.modifiers_for(condition)
+            non_fried = np.array([bool(_tags(m, _MODIFIER_RE) & NON_FRIED) for m in modifiers],
+                                 dtype=bool)
+            if not non_fried.any():
+                continue
+            cells = scorer.matrix[i, j, :len(dishes), :len(modifiers)]
+            for a, b in zip(*np.nonzero(np.isfinite(cells) & ~fried[:, None] & non_fried[None, :])):
+                bad.append(f"{modifiers[b]} {dishes[a]}")
+    assert not bad, bad[:10]
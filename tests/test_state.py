@@ -0,0 +1,70 @@
+import pytest
+
+from moodfood.state import MemoryBackend, RedisBackend, SharedState
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture(params=["memory", "redis"])
+def backend(request):
+    if request.param == "memory":
+        yield MemoryBackend()
+        return
+    redis = pytest.importorskip("redis")
+    from moodfood.stubs import RedisStub
+
+    with RedisStub() as server:
+        client = redis.Redis.from_url(server.url)
+        yield RedisBackend(client)
+        client.close()
+
+
+def test_write_on_one_client_reaches_the_other(backend):
+    clock = Clock()
+    a = SharedState(backend, max_stale=1.0, clock=clock)
+    b = SharedState(backend, max_stale=1.0, clock=clock)
+
+    assert b.get("picks") is None
+    a.set("picks", [1, 2, 3])
+    assert a.get("picks") == [1, 2, 3]
+    clock.now += 2
+    assert b.get("picks") == [1, 2, 3]
+
+    a.set("picks", [4])
+    assert b.get("picks") == [1, 2, 3]  # still fresh locally
+    clock.now += 2
+    assert b.get("picks") == [4]
+    assert b.misses == 2
+
+    clock.now += 2
+    assert b.get("picks") == [4]  # version unchanged: no refetch
+    assert (b.revalidated, b.misses) == (1, 2)
+
+    a.delete("picks")
+    b.invalidate("picks")
+    assert b.get("picks", "gone") == "gone"
+
+
+def test_memory_backend_evicts_and_expires():
+    clock = Clock()
+    backend = MemoryBackend(maxsize=2, ttl=10, clock=clock)
+    backend.set("a", 1)
+    backend.set("b", 2)
+    backend.get("a")
+    backend.set("c", 3)
+    assert backend.versions(["a", "b", "c"])[1] == 0
+    clock.now += 11
+    assert backend.get("a") == (0, None)
+
+
+def test_unwritten_keys_respect_maxsize():
+    state = SharedState(MemoryBackend(), maxsize=3)
+    for n in range(10):
+        assert state.get(f"user:{n}") is None
+    assert len(state._local) == 3